@@ -1,29 +1,171 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Flask, current_app, render_template, request, redirect, url_for, flash, jsonify, send_file, abort, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from flask.cli import with_appcontext
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, SelectField, TextAreaField, DateField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Email, NumberRange
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+import click
 import csv
+import logging
 import os
+import re
+import hashlib
 import secrets
+import threading
+import base64
 from werkzeug.utils import secure_filename
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+from werkzeug.local import LocalProxy
 import tempfile
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///toy_planner.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'static/uploads'
-
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-
-# Create upload directory if it doesn't exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+from functools import wraps
+import assets
+import compression
+import exports
+import images
+import logging_setup
+import session_store
+import sqlite_setup
+import template_cache
+from jobs import job_queue
+from rsvp_ingest import GroupCommitter
+from invitation_cache import BundleCache, InvitationBundle, InvitationView, BookingView, VenueView, HallView
+from live_events import EventBroker
+from rate_limit import rate_limiter
+from db_routing import RoutingSession, session_router
+
+log = logging.getLogger('toy_planner.app')
+rsvp_log = logging.getLogger('toy_planner.rsvp')
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = Migrate()
+# create_app() gives every app its own; these reach the one of the current app
+rsvp_committer = LocalProxy(lambda: current_app.extensions['rsvp_committer'])
+invitation_bundles = LocalProxy(lambda: current_app.extensions['invitation_bundles'])
+live_events = LocalProxy(lambda: current_app.extensions['live_events'])
+
+
+class RouteTable:
+    """Collects the views below so create_app can add them under their plain endpoint names"""
+
+    def __init__(self):
+        self.rules = []
+
+    def route(self, rule, **options):
+        def decorator(view):
+            self.rules.append((rule, options, view))
+            return view
+        return decorator
+
+    def register(self, app):
+        for rule, options, view in self.rules:
+            app.add_url_rule(rule, view_func=view, **options)
+
+
+routes = RouteTable()
+
+
+def create_app(config=None):
+    """Build the app; ``config`` (a dict) overrides the defaults below.
+
+    Building the app doesn't touch the database. Create the schema and the
+    sample venues with ``flask --app app init-db`` and ``flask --app app seed``.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'your-secret-key-here'
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///toy_planner.db'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 10, 'max_overflow': 10, 'pool_timeout': 30}
+    # Views marked @session_router.read_only query a read-only pool: this URL, or the primary SQLite file opened mode=ro
+    app.config['SQLALCHEMY_READ_URI'] = os.environ.get('SQLALCHEMY_READ_URI')
+    app.config['SQLALCHEMY_READ_ENGINE_OPTIONS'] = {'pool_size': 20, 'max_overflow': 10, 'pool_timeout': 30}
+    app.config['SQLITE_PRAGMAS'] = {}  # overrides for sqlite_setup.DEFAULT_PRAGMAS (WAL, busy_timeout, ...)
+    app.config['UPLOAD_FOLDER'] = 'static/uploads'
+    app.config['SESSION_STORE'] = 'sqlite'  # shared by all workers; 'memory' only suits a single process
+    app.config['SESSION_SWEEP_INTERVAL'] = 300  # seconds between expired-draft sweeps
+    app.config['SESSION_TTL'] = 2 * 3600  # seconds an anonymous session (CSRF token, booking draft) is kept
+    app.config['SESSION_MEMORY_MAX_ENTRIES'] = 10000  # the memory store evicts the least recently saved beyond this
+    app.config['SESSION_SKIP_PATHS'] = ('/assets/', '/img/')  # served without loading or saving the session
+    app.config['JOB_QUEUE_WORKERS'] = 2
+    app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')  # required for /admin/*; unset means 403 outside debug/testing
+    app.config['EXPORT_YIELD_PER'] = 1000  # rows fetched per round trip in streamed exports
+    app.config['FEEDBACK_EXPORT_DIR'] = os.path.join(app.instance_path, 'feedback_exports')
+    app.config['FEEDBACK_EXPORT_DEBOUNCE'] = 30  # seconds to wait for more feedback before rebuilding the workbook
+    app.config['FEEDBACK_STATS_CACHE_TTL'] = 60  # seconds /admin/feedback/stats results are reused
+    app.config['BOOKING_IMPORT_BATCH_SIZE'] = 500
+    app.config['BOOKING_SWEEP_INTERVAL'] = 3600  # seconds between stale-booking sweeps
+    app.config['PENDING_BOOKING_TTL_HOURS'] = 48  # unpaid bookings older than this are cancelled
+    app.config['COUNTER_RECONCILE_INTERVAL'] = 6 * 3600  # seconds between RSVP counter repairs
+    app.config['GUEST_PAGE_SIZE'] = 50  # guests per page on the invitation preview
+    # RSVP group commit: batch RSVP writes, flushing at RSVP_BATCH_SIZE items or after RSVP_BATCH_WAIT seconds
+    app.config['RSVP_GROUP_COMMIT'] = os.environ.get('RSVP_GROUP_COMMIT', '1') == '1'
+    app.config['RSVP_BATCH_SIZE'] = 50
+    app.config['RSVP_BATCH_WAIT'] = 0.05
+    app.config['RSVP_SUBMIT_TIMEOUT'] = 10  # seconds a guest waits for their RSVP to be committed
+    app.config['INVITATION_CACHE_TTL'] = 300  # seconds a cached public invitation page bundle stays valid
+    app.config['INVITATION_CACHE_SIZE'] = 1024
+    app.config['LIVE_EVENTS_HEARTBEAT'] = 15  # seconds between keep-alive comments on idle dashboard streams
+    app.config['LIVE_EVENTS_HISTORY'] = 200  # events kept per invitation for Last-Event-ID resume
+    app.config['LIVE_EVENTS_MAX_STREAM'] = 300  # seconds before a stream ends and the browser reconnects
+    app.config['GUEST_IMPORT_BATCH_SIZE'] = 500  # pre-invited guests inserted per statement
+    app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+    app.config['LOG_LEVELS'] = {}  # per-logger overrides, e.g. {'toy_planner.rsvp': 'DEBUG'}
+    app.config['LOG_FORMAT'] = os.environ.get('LOG_FORMAT', 'json')  # 'json' or 'text'
+    app.config['LOG_SAMPLE_RATES'] = {'rsvp.submitted': 0.1}  # keep 10% of per-RSVP info records
+    app.config['IMAGE_WIDTHS'] = (320, 640, 960)  # widths of the resized photo derivatives
+    app.config['IMAGE_QUALITY'] = 80
+    app.config['TEMPLATE_WARMUP'] = os.environ.get('TEMPLATE_WARMUP', '1') == '1'  # compile all templates at worker boot
+    app.config['COMPRESS_LEVEL'] = 6  # gzip level for dynamic responses; see /admin/compression
+    app.config['COMPRESS_MIN_SIZE'] = 500  # bytes below which responses are sent uncompressed
+    # Token buckets per client IP (and invitation token) on the public write endpoints
+    app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+    app.config['RATE_LIMIT_STORE'] = 'memory'  # use 'sqlite' to share limits between workers
+    app.config['RATE_LIMITS'] = {
+        'rsvp': '30/minute',  # guests at one venue often share a single IP
+        'api_rsvp': '10/minute',
+        'feedback': '5/minute',
+        'guest_import': '10/hour',
+    }
+    if config:
+        app.config.from_mapping(config)
+
+    logging_setup.init_app(app)
+    db.init_app(app)
+    sqlite_setup.init_app(app, db)
+    session_router.init_app(app, db)
+    migrate.init_app(app, db)
+    session_store.init_app(app)
+    jobs = job_queue.init_app(app)
+    EventBroker().init_app(app)
+    rate_limiter.init_app(app)
+    BundleCache().init_app(app, loader=load_invitation_bundle)
+    GroupCommitter().init_app(app, writer=write_rsvp_batch)
+    routes.register(app)
+    images.init_app(app)
+    assets.init_app(app)
+    compression.init_app(app)
+    template_cache.init_app(app)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(seed_command)
+
+    if app.config['BOOKING_SWEEP_INTERVAL']:
+        jobs.every('sweep_bookings', app.config['BOOKING_SWEEP_INTERVAL'])
+    if app.config['COUNTER_RECONCILE_INTERVAL']:
+        jobs.every('reconcile_invitation_counters', app.config['COUNTER_RECONCILE_INTERVAL'])
+
+    # Create upload directory if it doesn't exist
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    return app
+
+
+def __getattr__(name):
+    # `flask --app app`, `gunicorn app:app` and `from app import app` build the app on first use
+    if name == 'app':
+        app = globals()['app'] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Models
 class User(db.Model):
@@ -85,13 +227,22 @@ class Booking(db.Model):
     special_requests = db.Column(db.Text)
     total_amount = db.Column(db.Integer)  # in KZT
     deposit_paid = db.Column(db.Boolean, default=False)
-    status = db.Column(db.String(20), default='pending')  # pending, confirmed, cancelled
+    status = db.Column(db.String(20), default='pending')  # pending, confirmed, cancelled, completed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     selected_hall = db.relationship('Hall', backref='bookings')
     guests = db.relationship('Guest', backref='booking', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # Profile and add-on lookups go by client email, ordered by event date or recency
+        db.Index('ix_booking_client_email_event_date', 'client_email', 'event_date'),
+        db.Index('ix_booking_client_email_created_at', 'client_email', 'created_at'),
+        # Status filters: the booking sweeper and the profile upcoming/past split
+        db.Index('ix_booking_status_event_date', 'status', 'event_date'),
+        db.Index('ix_booking_user_id_status', 'user_id', 'status'),
+    )
+
 class Guest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     booking_id = db.Column(db.Integer, db.ForeignKey('booking.id'), nullable=False)
@@ -113,6 +264,25 @@ class Feedback(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='new')  # new, reviewed, resolved
 
+    __table_args__ = (
+        db.Index('ix_feedback_venue_created_at', 'venue', 'created_at'),
+        db.Index('ix_feedback_created_at', 'created_at'),
+    )
+
+class FeedbackRollup(db.Model):
+    """Feedback counts per day, venue, type, rating and recommendation.
+
+    Updated in the same transaction as each submission, so analytics read
+    this small table instead of scanning every feedback row. Feedback
+    without a venue or recommendation is counted under ''.
+    """
+    day = db.Column(db.Date, primary_key=True)
+    venue = db.Column(db.String(100), primary_key=True)
+    feedback_type = db.Column(db.String(50), primary_key=True)
+    rating = db.Column(db.Integer, primary_key=True)
+    recommendation = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
 class Invitation(db.Model):
     """Model for event invitations with unique links"""
     id = db.Column(db.Integer, primary_key=True)
@@ -125,6 +295,12 @@ class Invitation(db.Model):
     unique_token = db.Column(db.String(100), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # RSVP counters, kept in step with invited_guest rows by record_rsvp_counts()
+    invited_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    attending_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    declined_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    headcount = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # attending guests + plus-ones
+    
     booking = db.relationship('Booking', backref='invitations')
     invited_guests = db.relationship('InvitedGuest', backref='invitation', lazy=True, cascade='all, delete-orphan')
 
@@ -141,6 +317,15 @@ class InvitedGuest(db.Model):
     message_to_host = db.Column(db.Text)
     responded_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Personal RSVP link token for guests pre-invited from a contact list; NULL for self-submitted rows
+    token = db.Column(db.String(32), unique=True, index=True)
+
+    __table_args__ = (
+        # Guest list pages are keyset-paginated per invitation on (created_at, id)
+        db.Index('ix_invited_guest_invitation_id_created_at', 'invitation_id', 'created_at'),
+        # Pending counts and status-filtered guest list pages
+        db.Index('ix_invited_guest_invitation_id_rsvp_status_created_at', 'invitation_id', 'rsvp_status', 'created_at'),
+    )
 
 # Forms
 class VenueFilterForm(FlaskForm):
@@ -257,6 +442,11 @@ class GuestRSVPForm(FlaskForm):
                                    render_kw={'placeholder': 'Leave a message for the host...', 'rows': 3})
     submit = SubmitField('Submit RSVP')
 
+BOOKING_STATUSES = ('pending', 'confirmed', 'cancelled', 'completed')
+# Active bookings are the upcoming ones on a profile; the sweeper moves them to a finished status
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+FINISHED_BOOKING_STATUSES = ('cancelled', 'completed')
+
 # Helper functions
 def find_or_create_user(name, email, phone):
     """Find existing user by email or create new one"""
@@ -274,6 +464,172 @@ def find_or_create_user(name, email, phone):
         db.session.flush()  # Get the user ID
         return new_user
 
+def invitation_rsvp_stats(invitation_ids=None):
+    """RSVP statistics for several invitations at once.
+
+    Runs one query grouped by (invitation_id, rsvp_status) and returns
+    {invitation_id: {'total_invited', 'attending', 'not_attending', 'total_attending'}},
+    where total_attending counts attending guests plus their plus-ones.
+    Pass invitation_ids=None to count every invitation.
+    """
+    def empty():
+        return {'total_invited': 0, 'attending': 0, 'not_attending': 0, 'total_attending': 0}
+
+    query = (db.session.query(InvitedGuest.invitation_id,
+                              InvitedGuest.rsvp_status,
+                              db.func.count(InvitedGuest.id),
+                              db.func.sum(db.func.coalesce(InvitedGuest.plus_one, 0) + 1))
+             .group_by(InvitedGuest.invitation_id, InvitedGuest.rsvp_status))
+    stats = {}
+    if invitation_ids is not None:
+        invitation_ids = list(invitation_ids)
+        stats = {invitation_id: empty() for invitation_id in invitation_ids}
+        if not invitation_ids:
+            return stats
+        query = query.filter(InvitedGuest.invitation_id.in_(invitation_ids))
+
+    for invitation_id, rsvp_status, count, people in query.all():
+        entry = stats.setdefault(invitation_id, empty())
+        entry['total_invited'] += count
+        if rsvp_status == 'attending':
+            entry['attending'] = count
+            entry['total_attending'] = people or 0
+        elif rsvp_status == 'not_attending':
+            entry['not_attending'] = count
+    return stats
+
+def invitation_counters(invitation):
+    """Stats dict (same keys as invitation_rsvp_stats) read from the stored counters"""
+    return {
+        'total_invited': invitation.invited_count,
+        'attending': invitation.attending_count,
+        'not_attending': invitation.declined_count,
+        'total_attending': invitation.headcount,
+    }
+
+GUEST_LIST_COLUMNS = (
+    InvitedGuest.id, InvitedGuest.name, InvitedGuest.phone, InvitedGuest.rsvp_status,
+    db.func.coalesce(InvitedGuest.plus_one, 0).label('plus_one'),
+    InvitedGuest.dietary_restrictions, InvitedGuest.responded_at, InvitedGuest.created_at
+)
+
+def _encode_guest_cursor(row):
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_guest_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, guest_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(guest_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('invalid cursor')
+
+def guest_list_page(invitation_id, rsvp_status=None, name_prefix=None, cursor=None, limit=50):
+    """One page of an invitation's guests, newest first.
+
+    Keyset pagination on (created_at, id): ``cursor`` is the opaque value
+    returned as next_cursor by the previous page. Only the columns the
+    guest list shows are selected, so rows are light tuples rather than
+    ORM objects. Returns (rows, next_cursor); next_cursor is None on the
+    last page.
+    """
+    query = (db.session.query(*GUEST_LIST_COLUMNS)
+             .filter(InvitedGuest.invitation_id == invitation_id)
+             .order_by(InvitedGuest.created_at.desc(), InvitedGuest.id.desc()))
+    if rsvp_status:
+        query = query.filter(InvitedGuest.rsvp_status == rsvp_status)
+    if name_prefix:
+        escaped = name_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = query.filter(InvitedGuest.name.like(escaped + '%', escape='\\'))
+    if cursor:
+        created_at, guest_id = _decode_guest_cursor(cursor)
+        query = query.filter(db.or_(
+            InvitedGuest.created_at < created_at,
+            db.and_(InvitedGuest.created_at == created_at, InvitedGuest.id < guest_id)
+        ))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = _encode_guest_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def guest_row_json(row):
+    """JSON shape of one guest list row, shared by the guests API and the live dashboard"""
+    return {
+        'id': row.id,
+        'name': row.name,
+        'phone': row.phone,
+        'rsvp_status': row.rsvp_status,
+        'plus_one': row.plus_one or 0,
+        'dietary_restrictions': row.dietary_restrictions,
+        'responded_at': row.responded_at.isoformat() if row.responded_at else None,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+    }
+
+GUEST_EXPORT_COLUMNS = [
+    'name', 'phone', 'email', 'rsvp_status', 'plus_one', 'party_size', 'dietary_restrictions',
+    'message_to_host', 'responded_at'
+]
+
+# Dietary rollup categories and the substrings that put a guest in them. SQLite's
+# lower() only folds ASCII, so Russian stems drop their first letter to match
+# either case ('алал' matches both 'Халал' and 'халал').
+DIETARY_CATEGORIES = (
+    ('Halal', ('halal', 'алал')),
+    ('Vegetarian / vegan', ('vegetarian', 'vegan', 'егетариан', 'еган')),
+    ('Allergies', ('allerg', 'nut', 'gluten', 'lactose', 'ллерг', 'орех', 'глютен', 'лактоз')),
+)
+
+def guest_export_summary(invitation_id):
+    """Headcount and dietary rollup for attending guests, as (label, value) rows.
+
+    Computed with one aggregate query; a guest whose note matches several
+    categories (e.g. halal and a nut allergy) is counted in each.
+    """
+    note = db.func.lower(db.func.coalesce(InvitedGuest.dietary_restrictions, ''))
+    matches = [db.or_(*[note.like(f'%{pattern}%') for pattern in patterns])
+               for _, patterns in DIETARY_CATEGORIES]
+    row = (db.session.query(
+               db.func.count(InvitedGuest.id),
+               db.func.coalesce(db.func.sum(db.func.coalesce(InvitedGuest.plus_one, 0) + 1), 0),
+               *[db.func.coalesce(db.func.sum(db.case((match, 1), else_=0)), 0) for match in matches],
+               db.func.coalesce(db.func.sum(db.case((db.and_(note != '', ~db.or_(*matches)), 1), else_=0)), 0))
+           .filter(InvitedGuest.invitation_id == invitation_id,
+                   InvitedGuest.rsvp_status == 'attending')
+           .one())
+    responses, headcount, *dietary, other = row
+    return ([('Attending responses', responses), ('Headcount (incl. plus ones)', headcount)]
+            + [(label, count) for (label, _), count in zip(DIETARY_CATEGORIES, dietary)]
+            + [('Other dietary notes', other)])
+
+def record_rsvp_counts(invitation_id, old=None, new=None):
+    """Adjust an invitation's RSVP counters in the current transaction.
+
+    ``old`` and ``new`` are (rsvp_status, plus_one) of the guest row before
+    and after the write; pass old=None for a new guest. Uses relative
+    UPDATEs so concurrent RSVPs don't overwrite each other.
+    """
+    deltas = {'invited_count': 0, 'attending_count': 0, 'declined_count': 0, 'headcount': 0}
+    for entry, sign in ((old, -1), (new, 1)):
+        if entry is None:
+            continue
+        rsvp_status, plus_one = entry
+        deltas['invited_count'] += sign
+        if rsvp_status == 'attending':
+            deltas['attending_count'] += sign
+            deltas['headcount'] += sign * ((plus_one or 0) + 1)
+        elif rsvp_status == 'not_attending':
+            deltas['declined_count'] += sign
+
+    changes = {name: getattr(Invitation, name) + delta for name, delta in deltas.items() if delta}
+    if changes:
+        db.session.execute(
+            db.update(Invitation)
+            .where(Invitation.id == invitation_id)
+            .values(**changes)
+            .execution_options(synchronize_session=False)
+        )
+
 def load_csv_records(csv_filename):
     """Load generic records from a CSV file located in the instance folder.
 
@@ -311,17 +667,19 @@ def load_csv_records(csv_filename):
                 next_id += 1
                 records.append(normalized)
     except Exception as e:
-        print(f"Error loading CSV '{csv_filename}': {e}")
+        log.error("Error loading CSV '%s': %s", csv_filename, e)
     return records
 
 # Routes
-@app.route('/')
+@routes.route('/')
+@session_router.read_only
 def index():
     # Get featured venues for the main page
     venues = Venue.query.limit(6).all()  # Show first 6 venues
     return render_template('index.html', venues=venues)
 
-@app.route('/venues')
+@routes.route('/venues')
+@session_router.read_only
 def venues():
     form = VenueFilterForm()
     
@@ -357,7 +715,7 @@ def venues():
     venues_list = query.all()
     return render_template('venues.html', venues=venues_list, form=form)
 
-@app.route('/hosts')
+@routes.route('/hosts')
 def hosts():
     """Display list of event hosts from CSV with filters."""
     form = HostFilterForm()
@@ -396,7 +754,7 @@ def hosts():
 
     return render_template('hosts.html', hosts=filtered, form=form)
 
-@app.route('/musicians')
+@routes.route('/musicians')
 def musicians():
     """Display list of musicians/bands from CSV with filters."""
     form = MusicianFilterForm()
@@ -433,7 +791,7 @@ def musicians():
 
     return render_template('musicians.html', musicians=filtered, form=form)
 
-@app.route('/host/<id>')
+@routes.route('/host/<id>')
 def host_detail(id):
     hosts = load_csv_records('hosts.csv')
     host = next((h for h in hosts if str(h.get('id')) == str(id)), None)
@@ -441,7 +799,7 @@ def host_detail(id):
         return redirect(url_for('hosts'))
     return render_template('host_detail.html', host=host)
 
-@app.route('/musician/<id>')
+@routes.route('/musician/<id>')
 def musician_detail(id):
     musicians = load_csv_records('musicians.csv')
     artist = next((m for m in musicians if str(m.get('id')) == str(id)), None)
@@ -449,12 +807,13 @@ def musician_detail(id):
         return redirect(url_for('musicians'))
     return render_template('musician_detail.html', musician=artist)
 
-@app.route('/venue/<int:venue_id>')
+@routes.route('/venue/<int:venue_id>')
+@session_router.read_only
 def venue_detail(venue_id):
     venue = Venue.query.get_or_404(venue_id)
     return render_template('venue_detail.html', venue=venue)
 
-@app.route('/book/<int:venue_id>', methods=['GET', 'POST'])
+@routes.route('/book/<int:venue_id>', methods=['GET', 'POST'])
 def book_venue(venue_id):
     venue = Venue.query.get_or_404(venue_id)
     form = BookingForm()
@@ -507,7 +866,7 @@ def book_venue(venue_id):
         form.event_type.data = request.args.get('event_type')
     
     if form.validate_on_submit():
-        # Store booking data in session for payment confirmation
+        # Store booking data in the server-side session for payment confirmation
         from flask import session
         session['booking_data'] = {
             'venue_id': venue_id,
@@ -526,7 +885,7 @@ def book_venue(venue_id):
     
     return render_template('book_venue.html', venue=venue, form=form)
 
-@app.route('/payment/confirmation', methods=['GET', 'POST'])
+@routes.route('/payment/confirmation', methods=['GET', 'POST'])
 def payment_confirmation():
     from flask import session
     from datetime import datetime as dt
@@ -581,17 +940,20 @@ def payment_confirmation():
                          selected_hall=selected_hall,
                          form=form)
 
-@app.route('/booking/<int:booking_id>/confirmation')
+@routes.route('/booking/<int:booking_id>/confirmation')
+@session_router.read_only
 def booking_confirmation(booking_id):
     booking = Booking.query.get_or_404(booking_id)
     return render_template('booking_confirmation.html', booking=booking)
 
-@app.route('/rsvp/<int:booking_id>')
+@routes.route('/rsvp/<int:booking_id>')
+@session_router.read_only
 def guest_rsvp(booking_id):
     booking = Booking.query.get_or_404(booking_id)
     return render_template('guest_rsvp.html', booking=booking)
 
-@app.route('/api/rsvp', methods=['POST'])
+@routes.route('/api/rsvp', methods=['POST'])
+@rate_limiter.limit('api_rsvp')
 def submit_rsvp():
     data = request.json
     guest = Guest(
@@ -607,11 +969,12 @@ def submit_rsvp():
     
     return jsonify({'success': True, 'message': 'RSVP submitted successfully!'})
 
-@app.route('/feedback')
+@routes.route('/feedback')
 def feedback_page():
     return render_template('feedback.html')
 
-@app.route('/submit_feedback', methods=['POST'])
+@routes.route('/submit_feedback', methods=['POST'])
+@rate_limiter.limit('feedback')
 def submit_feedback():
     try:
         # Get form data with validation
@@ -651,150 +1014,372 @@ def submit_feedback():
         )
         
         db.session.add(feedback)
+        db.session.flush()  # fills in created_at
+        record_feedback_rollup(feedback)
         db.session.commit()
+        clear_feedback_stats_cache()
         
-        # Save feedback data to Excel file AFTER database commit so feedback.id is available
+        # Rebuild the downloadable workbook in the background; bursts of feedback share one rebuild
         try:
-            save_feedback_to_excel(feedback)
-            print(f"Successfully saved feedback ID {feedback.id} to Excel")
-        except Exception as excel_error:
-            print(f"Warning: Could not save feedback ID {feedback.id} to Excel: {excel_error}")
-            # Continue with success message even if Excel save fails
+            job_queue.enqueue_unique('build_feedback_workbook', delay=current_app.config['FEEDBACK_EXPORT_DEBOUNCE'])
+        except Exception as queue_error:
+            log.warning('Could not queue feedback workbook rebuild: %s', queue_error)
+            # The download builds the workbook on demand anyway
         
         flash('Thank you for your feedback! We appreciate your input and will use it to improve our services.', 'success')
         return redirect(url_for('feedback_success'))
         
-    except Exception as e:
-        print(f"Feedback submission error: {e}")  # Debug logging
+    except Exception:
+        log.exception('Feedback submission failed')
         db.session.rollback()
         flash('There was an error submitting your feedback. Please try again.', 'error')
         return redirect(url_for('feedback_page'))
 
-@app.route('/feedback/success')
+@routes.route('/feedback/success')
 def feedback_success():
     return render_template('feedback_success.html')
 
-def save_feedback_to_excel(feedback):
-    """Save feedback data to Excel file"""
-    try:
-        excel_file_path = os.path.join('static', 'feedback_data.xlsx')
-        
-        # Check if file exists
-        if os.path.exists(excel_file_path):
-            # Load existing workbook
-            from openpyxl import load_workbook
-            wb = load_workbook(excel_file_path)
-            ws = wb.active
-        else:
-            # Create new workbook
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Feedback Data"
-            
-            # Create headers with styling
-            headers = [
-                'ID', 'Date & Time', 'Name', 'Email', 'Overall Rating', 
-                'Feedback Type', 'Recommendation', 'Related Venue', 'Message', 'Status'
-            ]
-            
-            # Style headers
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-            
-            # Set column widths
-            column_widths = [8, 20, 25, 30, 15, 15, 20, 25, 50, 12]
-            for col, width in enumerate(column_widths, 1):
-                ws.column_dimensions[ws.cell(row=1, column=col).column_letter].width = width
-        
-        # Convert rating number to text
-        rating_text = {
-            5: "😍 Excellent",
-            4: "😊 Very Good", 
-            3: "😐 Good",
-            2: "😕 Fair",
-            1: "😞 Poor"
-        }.get(feedback.rating, f"Rating {feedback.rating}")
-        
-        # Convert feedback type to readable format
-        feedback_type_text = {
-            'compliment': '👏 Compliment',
-            'suggestion': '💡 Suggestion',
-            'complaint': '😟 Complaint',
-            'general': '💬 General'
-        }.get(feedback.feedback_type, feedback.feedback_type.title())
-        
-        # Convert recommendation to readable format
-        recommendation_text = {
-            'definitely': 'Definitely! 🎉',
-            'probably': 'Probably 👍',
-            'maybe': 'Maybe 🤔',
-            'probably_not': 'Probably not 👎',
-            'definitely_not': 'Definitely not ❌'
-        }.get(feedback.recommendation, feedback.recommendation)
-        
-        # Add new row
-        new_row = [
-            feedback.id,
-            feedback.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            feedback.name,
-            feedback.email,
-            rating_text,
-            feedback_type_text,
-            recommendation_text,
-            feedback.venue or 'N/A',
-            feedback.message,
-            feedback.status.title()
+FEEDBACK_RATING_TEXT = {
+    5: "😍 Excellent",
+    4: "😊 Very Good",
+    3: "😐 Good",
+    2: "😕 Fair",
+    1: "😞 Poor"
+}
+FEEDBACK_TYPE_TEXT = {
+    'compliment': '👏 Compliment',
+    'suggestion': '💡 Suggestion',
+    'complaint': '😟 Complaint',
+    'general': '💬 General'
+}
+FEEDBACK_RECOMMENDATION_TEXT = {
+    'definitely': 'Definitely! 🎉',
+    'probably': 'Probably 👍',
+    'maybe': 'Maybe 🤔',
+    'probably_not': 'Probably not 👎',
+    'definitely_not': 'Definitely not ❌'
+}
+
+FEEDBACK_EXPORT_HEADERS = [
+    'ID', 'Date & Time', 'Name', 'Email', 'Overall Rating',
+    'Feedback Type', 'Recommendation', 'Related Venue', 'Message', 'Status'
+]
+
+def feedback_export_query(date_from=None, date_to=None, venue=None, feedback_type=None, status=None):
+    """Select the exported feedback columns, optionally filtered; dates are inclusive"""
+    stmt = (db.select(Feedback.id, Feedback.created_at, Feedback.name, Feedback.email, Feedback.rating,
+                      Feedback.feedback_type, Feedback.recommendation, Feedback.venue, Feedback.message,
+                      Feedback.status)
+            .order_by(Feedback.id))
+    if date_from:
+        stmt = stmt.where(Feedback.created_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        stmt = stmt.where(Feedback.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    if venue:
+        stmt = stmt.where(Feedback.venue == venue)
+    if feedback_type:
+        stmt = stmt.where(Feedback.feedback_type == feedback_type)
+    if status:
+        stmt = stmt.where(Feedback.status == status)
+    return stmt
+
+def feedback_export_rows(stmt):
+    """Run a feedback_export_query in chunks and yield spreadsheet-ready rows"""
+    result = db.session.execute(stmt, execution_options={'yield_per': current_app.config['EXPORT_YIELD_PER']})
+    for row in result:
+        yield [
+            row.id,
+            row.created_at.strftime('%Y-%m-%d %H:%M:%S') if row.created_at else '',
+            row.name,
+            row.email,
+            FEEDBACK_RATING_TEXT.get(row.rating, f"Rating {row.rating}"),
+            FEEDBACK_TYPE_TEXT.get(row.feedback_type, (row.feedback_type or '').title()),
+            FEEDBACK_RECOMMENDATION_TEXT.get(row.recommendation, row.recommendation),
+            row.venue or 'N/A',
+            row.message,
+            (row.status or 'new').title()
         ]
-        
-        ws.append(new_row)
-        
-        # Style the new row
-        row_num = ws.max_row
-        for col in range(1, len(new_row) + 1):
-            cell = ws.cell(row=row_num, column=col)
-            cell.alignment = Alignment(wrap_text=True, vertical="top")
-            
+
+_feedback_workbook_lock = threading.Lock()
+
+# INSERT ... ON CONFLICT DO UPDATE constructs, by dialect name
+UPSERT_INSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+def record_feedback_rollup(feedback):
+    """Count a new feedback row in FeedbackRollup, in the current transaction"""
+    key = {
+        'day': feedback.created_at.date(),
+        'venue': feedback.venue or '',
+        'feedback_type': feedback.feedback_type,
+        'rating': feedback.rating,
+        'recommendation': feedback.recommendation or '',
+    }
+    count = FeedbackRollup.__table__.c.count
+    upsert_insert = UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if upsert_insert is not None:
+        db.session.execute(upsert_insert(FeedbackRollup).values(**key, count=1).on_conflict_do_update(
+            index_elements=list(key),
+            set_={'count': count + 1},
+        ))
+        return
+    # Other databases: bump the row, or add it when this is the first one for the key
+    updated = db.session.execute(
+        db.update(FeedbackRollup.__table__)
+        .where(*[FeedbackRollup.__table__.c[name] == value for name, value in key.items()])
+        .values(count=count + 1)
+    ).rowcount
+    if not updated:
+        db.session.execute(db.insert(FeedbackRollup.__table__).values(**key, count=1))
+
+# NPS-style buckets for the 'Would you recommend us?' answers
+RECOMMENDATION_NPS_GROUP = {
+    'definitely': 'promoters',
+    'probably': 'passives',
+    'maybe': 'detractors',
+    'probably_not': 'detractors',
+    'definitely_not': 'detractors',
+}
+
+_feedback_stats_cache = {}
+_feedback_stats_lock = threading.Lock()
+
+def clear_feedback_stats_cache():
+    with _feedback_stats_lock:
+        _feedback_stats_cache.clear()
+
+def _feedback_summary(by_recommendation):
+    """count, average rating and NPS from {recommendation: (count, rating_sum)}"""
+    groups = {'promoters': 0, 'passives': 0, 'detractors': 0}
+    count = rating_sum = 0
+    for recommendation, (n, ratings) in by_recommendation.items():
+        count += n
+        rating_sum += ratings
+        group = RECOMMENDATION_NPS_GROUP.get(recommendation)
+        if group:
+            groups[group] += n
+    answered = sum(groups.values())
+    return {
+        'count': count,
+        'average_rating': round(rating_sum / count, 2) if count else None,
+        'nps': dict(groups, score=round((groups['promoters'] - groups['detractors']) * 100 / answered)
+                    if answered else None),
+    }
+
+def feedback_stats(date_from=None, date_to=None):
+    """Feedback analytics for a date window, aggregated from FeedbackRollup.
+
+    Results are cached for FEEDBACK_STATS_CACHE_TTL seconds per window and
+    dropped when this process takes new feedback.
+    """
+    key = (date_from, date_to)
+    now = datetime.utcnow()
+    with _feedback_stats_lock:
+        cached = _feedback_stats_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    filters = []
+    if date_from:
+        filters.append(FeedbackRollup.day >= date_from)
+    if date_to:
+        filters.append(FeedbackRollup.day <= date_to)
+    total = db.func.sum(FeedbackRollup.count)
+    rating_sum = db.func.sum(FeedbackRollup.rating * FeedbackRollup.count)
+
+    def grouped(*columns):
+        return (db.session.query(*columns, total, rating_sum)
+                .filter(*filters)
+                .group_by(*columns)
+                .all())
+
+    ratings = {rating: 0 for rating in range(1, 6)}
+    for rating, count, _ in grouped(FeedbackRollup.rating):
+        ratings[rating] = count
+
+    overall = {}
+    by_venue = {}
+    for venue, recommendation, count, ratings_total in grouped(FeedbackRollup.venue, FeedbackRollup.recommendation):
+        by_venue.setdefault(venue, {})[recommendation] = (count, ratings_total)
+        previous = overall.get(recommendation, (0, 0))
+        overall[recommendation] = (previous[0] + count, previous[1] + ratings_total)
+
+    by_type = {}
+    for feedback_type, recommendation, count, ratings_total in grouped(FeedbackRollup.feedback_type,
+                                                                        FeedbackRollup.recommendation):
+        by_type.setdefault(feedback_type, {})[recommendation] = (count, ratings_total)
+
+    stats = dict(
+        _feedback_summary(overall),
+        window={'from': date_from.isoformat() if date_from else None,
+                'to': date_to.isoformat() if date_to else None},
+        ratings={str(rating): count for rating, count in ratings.items()},
+        by_venue=sorted(({'venue': venue or None, **_feedback_summary(rows)} for venue, rows in by_venue.items()),
+                        key=lambda entry: -entry['count']),
+        by_type={feedback_type: _feedback_summary(rows) for feedback_type, rows in by_type.items()},
+        by_day=[{'day': day.isoformat(), 'count': count, 'average_rating': round(ratings_total / count, 2)}
+                for day, count, ratings_total in sorted(grouped(FeedbackRollup.day))],
+    )
+    with _feedback_stats_lock:
+        _feedback_stats_cache[key] = (stats, now + timedelta(seconds=current_app.config['FEEDBACK_STATS_CACHE_TTL']))
+    return stats
+
+def feedback_workbook_path():
+    """Path of the feedback workbook for the current data.
+
+    The file name carries the feedback row count and newest id, so a new
+    submission simply makes the cached file stale - nothing has to be
+    rewritten on the request path.
+    """
+    count, newest = db.session.query(db.func.count(Feedback.id), db.func.max(Feedback.id)).one()
+    return os.path.join(current_app.config['FEEDBACK_EXPORT_DIR'], f'feedback_{count}_{newest or 0}.xlsx')
+
+def build_feedback_workbook(path):
+    """Stream every feedback row from the database into a styled xlsx at ``path``.
+
+    Uses openpyxl write-only mode, so memory stays flat however many rows
+    there are. The file is written next to ``path`` and renamed into
+    place, so readers never see a half-written workbook.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Feedback Data")
+
+    # Set column widths
+    column_widths = [8, 20, 25, 30, 15, 15, 20, 25, 50, 12]
+    for col, width in enumerate(column_widths, 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    # Create headers with styling
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    header_cells = []
+    for header in FEEDBACK_EXPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    row_alignment = Alignment(wrap_text=True, vertical="top")
+    stripe_fill = PatternFill(start_color="F8F9FA", end_color="F8F9FA", fill_type="solid")
+    for row_num, values in enumerate(feedback_export_rows(feedback_export_query()), start=2):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.alignment = row_alignment
             # Alternate row colors
             if row_num % 2 == 0:
-                cell.fill = PatternFill(start_color="F8F9FA", end_color="F8F9FA", fill_type="solid")
-        
-        # Save the workbook
-        wb.save(excel_file_path)
-        print(f"Feedback saved to Excel: {excel_file_path}")
-        
-    except Exception as e:
-        print(f"Error saving feedback to Excel: {e}")
-
-@app.route('/download_feedback_excel')
+                cell.fill = stripe_fill
+            cells.append(cell)
+        ws.append(cells)
+
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    wb.save(tmp_path)
+    os.replace(tmp_path, path)
+
+def ensure_feedback_workbook():
+    """Return the path of an up-to-date feedback workbook, building it if needed"""
+    path = feedback_workbook_path()
+    if os.path.exists(path):
+        return path
+    with _feedback_workbook_lock:
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            build_feedback_workbook(path)
+            # Older snapshots are superseded
+            for name in os.listdir(os.path.dirname(path)):
+                old = os.path.join(os.path.dirname(path), name)
+                if name.startswith('feedback_') and name.endswith('.xlsx') and old != path:
+                    try:
+                        os.remove(old)
+                    except OSError:
+                        pass
+            log.info('Feedback workbook rebuilt: %s', os.path.basename(path),
+                     extra={'event': 'feedback.workbook_built'})
+    return path
+
+@job_queue.task('build_feedback_workbook')
+def build_feedback_workbook_job():
+    """Background job: rebuild the cached feedback workbook after new submissions"""
+    ensure_feedback_workbook()
+
+@routes.route('/download_feedback_excel')
+@session_router.read_only
 def download_feedback_excel():
-    """Download the feedback Excel file"""
+    """Download feedback as XLSX (default) or ?format=csv.
+
+    Filters: ?date_from=&date_to= (YYYY-MM-DD, inclusive), ?venue=, ?type=,
+    ?status=. The unfiltered workbook is the cached snapshot; filtered
+    downloads are generated and streamed from the database. Both carry an
+    ETag, so downloading an unchanged range again returns 304.
+    """
+    export_format = request.args.get('format', 'xlsx').lower()
+    if export_format not in ('csv', 'xlsx'):
+        flash('Unknown download format.', 'error')
+        return redirect(url_for('index'))
     try:
-        excel_file_path = os.path.join('static', 'feedback_data.xlsx')
-        
-        if os.path.exists(excel_file_path):
+        filters = {
+            'date_from': _parse_iso_date(request.args['date_from'], 'date_from') if request.args.get('date_from') else None,
+            'date_to': _parse_iso_date(request.args['date_to'], 'date_to') if request.args.get('date_to') else None,
+            'venue': request.args.get('venue') or None,
+            'feedback_type': request.args.get('type') or None,
+            'status': request.args.get('status') or None,
+        }
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('index'))
+
+    try:
+        stmt = feedback_export_query(**filters)
+        count, newest = db.session.execute(
+            stmt.with_only_columns(db.func.count(Feedback.id), db.func.max(Feedback.id)).order_by(None)
+        ).one()
+        if not count:
+            flash('No feedback data available for download.', 'info')
+            return redirect(url_for('index'))
+
+        filename = f'toy_planner_feedback_{datetime.now().strftime("%Y%m%d")}.{export_format}'
+        if export_format == 'xlsx' and not any(filters.values()):
             return send_file(
-                excel_file_path,
+                ensure_feedback_workbook(),
                 as_attachment=True,
-                download_name=f'toy_planner_feedback_{datetime.now().strftime("%Y%m%d")}.xlsx',
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                download_name=filename,
+                mimetype=exports.XLSX_MIMETYPE,
+                conditional=True
             )
+
+        # The rows in a range only change when feedback is added to it
+        fingerprint = repr((export_format, sorted(filters.items()), count, newest))
+        etag = hashlib.sha1(fingerprint.encode()).hexdigest()
+        # Weak match: the compression middleware marks the tag weak on gzipped responses
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        if export_format == 'xlsx':
+            body = exports.iter_xlsx([('Feedback Data', FEEDBACK_EXPORT_HEADERS, feedback_export_rows(stmt))])
+            mimetype = exports.XLSX_MIMETYPE
         else:
-            flash('No feedback data available for download.', 'info')
-            return redirect(url_for('index'))
-            
-    except Exception as e:
-        print(f"Error downloading feedback Excel: {e}")
+            body = exports.iter_csv(FEEDBACK_EXPORT_HEADERS, feedback_export_rows(stmt))
+            mimetype = exports.CSV_MIMETYPE
+        response = Response(stream_with_context(body), mimetype=mimetype,
+                            headers={'Content-Disposition': f'attachment; filename={filename}'})
+        response.set_etag(etag)
+        return response
+
+    except Exception:
+        log.exception('Error downloading feedback Excel')
         flash('Error downloading feedback data.', 'error')
         return redirect(url_for('index'))
 
-@app.route('/profile', methods=['GET', 'POST'])
+@routes.route('/profile', methods=['GET', 'POST'])
 def profile():
     """Profile page where users can enter email and phone to view their bookings"""
     from flask import session
@@ -821,6 +1406,8 @@ def profile():
         user = User.query.filter_by(email=email, phone=phone).first()
         
         if user:
+            # New session id on login, so an id planted before it can't ride along
+            session.regenerate()
             # Store user info in session for persistence
             session['user_id'] = user.id
             session['user_email'] = user.email
@@ -831,17 +1418,19 @@ def profile():
     
     return render_template('profile.html', form=form)
 
-@app.route('/logout')
+@routes.route('/logout')
 def logout():
     """Logout user by clearing session data"""
     from flask import session
     session.pop('user_id', None)
     session.pop('user_email', None)
     session.pop('user_phone', None)
+    session.regenerate()
     flash('You have been successfully logged out.', 'info')
     return redirect(url_for('profile'))
 
-@app.route('/profile/<int:user_id>')
+@routes.route('/profile/<int:user_id>')
+@session_router.read_only
 def user_profile(user_id):
     """Display user's booking history and profile information"""
     from flask import session
@@ -854,38 +1443,41 @@ def user_profile(user_id):
         flash('Please log in to access your profile.', 'warning')
         return redirect(url_for('profile'))
     
-    # Get all bookings for this user, ordered by most recent first
-    bookings = Booking.query.filter_by(user_id=user_id).order_by(Booking.created_at.desc()).all()
-    
-    # Separate bookings by status
-    upcoming_bookings = [b for b in bookings if b.event_date >= date.today() and b.status in ['pending', 'confirmed']]
-    past_bookings = [b for b in bookings if b.event_date < date.today() or b.status == 'cancelled']
+    # Split bookings by status in SQL (indexed on user_id, status), most recent first.
+    # The booking sweeper moves finished events to 'completed'; the date check covers
+    # events that ended since its last run.
+    today = date.today()
+    # Batch-load everything the template touches per booking (one query per relationship)
+    booking_options = (
+        db.selectinload(Booking.venue),
+        db.selectinload(Booking.selected_hall),
+        db.selectinload(Booking.invitations).selectinload(Invitation.invited_guests),
+    )
+    upcoming_bookings = (Booking.query
+                         .options(*booking_options)
+                         .filter(Booking.user_id == user_id,
+                                 Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+                                 Booking.event_date >= today)
+                         .order_by(Booking.created_at.desc())
+                         .all())
+    past_bookings = (Booking.query
+                     .options(*booking_options)
+                     .filter(Booking.user_id == user_id,
+                             db.or_(Booking.status.in_(FINISHED_BOOKING_STATUSES), Booking.event_date < today))
+                     .order_by(Booking.created_at.desc())
+                     .all())
+    bookings = upcoming_bookings + past_bookings
     
     # Calculate total spent (30% deposits only - what user actually paid)
-    total_spent = sum(int(booking.total_amount * 0.3) for booking in bookings if booking.total_amount and booking.deposit_paid)
+    total_spent = db.session.query(
+        db.func.sum(db.cast(Booking.total_amount * 0.3, db.Integer))
+    ).filter(
+        Booking.user_id == user_id,
+        Booking.deposit_paid.is_(True)
+    ).scalar() or 0
     
-    # Calculate invitation statistics for each booking
-    booking_stats = {}
-    for booking in bookings:
-        if booking.invitations:
-            invitation = booking.invitations[0]  # Get the first invitation
-            total_invited = InvitedGuest.query.filter_by(invitation_id=invitation.id).count()
-            attending = InvitedGuest.query.filter_by(invitation_id=invitation.id, rsvp_status='attending').count()
-            not_attending = InvitedGuest.query.filter_by(invitation_id=invitation.id, rsvp_status='not_attending').count()
-            
-            total_attending = db.session.query(
-                db.func.sum(InvitedGuest.plus_one + 1)
-            ).filter(
-                InvitedGuest.invitation_id == invitation.id,
-                InvitedGuest.rsvp_status == 'attending'
-            ).scalar() or 0
-            
-            booking_stats[booking.id] = {
-                'total_invited': total_invited,
-                'attending': attending,
-                'not_attending': not_attending,
-                'total_attending': total_attending
-            }
+    # Invitation statistics come from the counters on the (already loaded) invitations
+    booking_stats = {b.id: invitation_counters(b.invitations[0]) for b in bookings if b.invitations}
     
     return render_template('user_profile.html', 
                          user=user, 
@@ -905,19 +1497,18 @@ def _parse_price_from_record(record):
     return None
 
 def _find_latest_relevant_booking_by_email(email):
-    # Prefer upcoming bookings first, else fall back to latest any booking
-    upcoming = (Booking.query
-                .filter(Booking.client_email == email, Booking.event_date >= date.today())
-                .order_by(Booking.event_date.asc(), Booking.created_at.desc())
-                .first())
-    if upcoming:
-        return upcoming
+    # Prefer the nearest upcoming booking, else fall back to the latest booking.
+    # Done in one query: upcoming rows sort first (by event date), then the rest by recency.
+    today = date.today()
+    is_upcoming = Booking.event_date >= today
     return (Booking.query
             .filter(Booking.client_email == email)
-            .order_by(Booking.created_at.desc())
+            .order_by(db.case((is_upcoming, 0), else_=1),
+                      db.case((is_upcoming, Booking.event_date)),
+                      Booking.created_at.desc())
             .first())
 
-@app.route('/book_host/<id>', methods=['GET', 'POST'])
+@routes.route('/book_host/<id>', methods=['GET', 'POST'])
 def book_host(id):
     hosts = load_csv_records('hosts.csv')
     host = next((h for h in hosts if str(h.get('id')) == str(id)), None)
@@ -953,7 +1544,7 @@ def book_host(id):
 
     return render_template('book_host.html', host=host, form=form)
 
-@app.route('/book_musician/<id>', methods=['GET', 'POST'])
+@routes.route('/book_musician/<id>', methods=['GET', 'POST'])
 def book_musician(id):
     musicians = load_csv_records('musicians.csv')
     artist = next((m for m in musicians if str(m.get('id')) == str(id)), None)
@@ -989,14 +1580,348 @@ def book_musician(id):
 
     return render_template('book_musician.html', musician=artist, form=form)
 
+# ========== ADMIN ROUTES ==========
+
+
+BOOKING_EXPORT_COLUMNS = [
+    'id', 'venue_id', 'venue_name', 'selected_hall_id', 'hall_name', 'client_name', 'client_email',
+    'client_phone', 'event_type', 'event_date', 'guest_count', 'total_amount', 'deposit_paid',
+    'status', 'special_requests', 'created_at'
+]
+
+def admin_required(view):
+    """Require the ADMIN_TOKEN (header X-Admin-Token or ?admin_token=).
+
+    Without a configured token the admin routes are closed, except in debug
+    or testing mode.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get('ADMIN_TOKEN')
+        if expected:
+            supplied = request.headers.get('X-Admin-Token') or request.args.get('admin_token', '')
+            if not secrets.compare_digest(supplied, expected):
+                abort(403)
+        elif not (current_app.debug or current_app.testing):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+def _parse_iso_date(value, field):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a date in YYYY-MM-DD format")
+
+@routes.route('/admin/jobs')
+@admin_required
+def job_queue_stats():
+    """Queue depth and job latency for the background job queue"""
+    return jsonify(job_queue.stats())
+
+@routes.route('/admin/feedback/stats')
+@admin_required
+@session_router.read_only
+def admin_feedback_stats():
+    """Feedback analytics for ?days=N (default 30, 0 for all time) or ?date_from=&date_to="""
+    try:
+        date_from = _parse_iso_date(request.args['date_from'], 'date_from') if request.args.get('date_from') else None
+        date_to = _parse_iso_date(request.args['date_to'], 'date_to') if request.args.get('date_to') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not date_from and not date_to:
+        days = request.args.get('days', 30, type=int)
+        if days:
+            date_to = datetime.utcnow().date()
+            date_from = date_to - timedelta(days=days - 1)
+    return jsonify(feedback_stats(date_from, date_to))
+
+@routes.route('/admin/rate-limits')
+@admin_required
+def rate_limit_stats():
+    """Allowed and rejected request counts per rate-limited route (this process)"""
+    return jsonify(rate_limiter.stats())
+
+@routes.route('/admin/compression')
+@admin_required
+def compression_stats():
+    """Response compression counts, bytes saved and CPU time spent (this process)"""
+    return jsonify(current_app.extensions['compression'].stats())
+
+@routes.route('/admin/bookings/export')
+@admin_required
+@session_router.read_only
+def export_bookings():
+    """Stream bookings as CSV or XLSX, filtered by venue, date range and status"""
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'xlsx'):
+        return jsonify({'error': 'format must be csv or xlsx'}), 400
+
+    stmt = (db.select(
+                Booking.id, Booking.venue_id, Venue.name, Booking.selected_hall_id, Hall.name,
+                Booking.client_name, Booking.client_email, Booking.client_phone, Booking.event_type,
+                Booking.event_date, Booking.guest_count, Booking.total_amount, Booking.deposit_paid,
+                Booking.status, Booking.special_requests, Booking.created_at)
+            .join(Venue, Venue.id == Booking.venue_id)
+            .outerjoin(Hall, Hall.id == Booking.selected_hall_id)
+            .order_by(Booking.event_date, Booking.id))
+    try:
+        if request.args.get('venue_id'):
+            stmt = stmt.where(Booking.venue_id == int(request.args['venue_id']))
+        if request.args.get('date_from'):
+            stmt = stmt.where(Booking.event_date >= _parse_iso_date(request.args['date_from'], 'date_from'))
+        if request.args.get('date_to'):
+            stmt = stmt.where(Booking.event_date <= _parse_iso_date(request.args['date_to'], 'date_to'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if request.args.get('status'):
+        stmt = stmt.where(Booking.status == request.args['status'])
+
+    def rows():
+        # Plain column tuples fetched in chunks - no ORM objects are built
+        result = db.session.execute(stmt, execution_options={'yield_per': current_app.config['EXPORT_YIELD_PER']})
+        for row in result:
+            yield ['' if value is None else value for value in row]
+
+    stamp = datetime.now().strftime('%Y%m%d')
+    if export_format == 'xlsx':
+        body = exports.iter_xlsx([('Bookings', BOOKING_EXPORT_COLUMNS, rows())])
+        mimetype, filename = exports.XLSX_MIMETYPE, f'bookings_{stamp}.xlsx'
+    else:
+        body = exports.iter_csv(BOOKING_EXPORT_COLUMNS, rows())
+        mimetype, filename = exports.CSV_MIMETYPE, f'bookings_{stamp}.csv'
+
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+def _booking_from_import_row(row, halls_by_venue):
+    """Validate one imported row and return its Booking column values.
+
+    A row with an ``id`` (as in the export) is an edit of that booking, so its
+    values carry the id and no created_at.
+    """
+    def required(field):
+        value = str(row.get(field, '') or '').strip()
+        if not value:
+            raise ValueError(f"{field} is required")
+        return value
+
+    try:
+        venue_id = int(required('venue_id'))
+    except ValueError as e:
+        raise ValueError(str(e) if 'required' in str(e) else 'venue_id must be a number')
+    if venue_id not in halls_by_venue:
+        raise ValueError(f"venue {venue_id} does not exist")
+
+    hall_value = str(row.get('selected_hall_id', '') or '').strip()
+    hall_id = int(float(hall_value)) if hall_value else None
+    if hall_id is not None and hall_id not in halls_by_venue[venue_id]:
+        raise ValueError(f"hall {hall_id} does not belong to venue {venue_id}")
+
+    event_date = row.get('event_date')
+    if isinstance(event_date, datetime):
+        event_date = event_date.date()
+    elif not isinstance(event_date, date):
+        event_date = _parse_iso_date(required('event_date')[:10], 'event_date')
+
+    guest_count = int(float(required('guest_count')))
+    if guest_count < 1:
+        raise ValueError('guest_count must be at least 1')
+
+    status = str(row.get('status', '') or 'pending').strip()
+    if status not in BOOKING_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(BOOKING_STATUSES)}")
+
+    email = required('client_email')
+    if '@' not in email:
+        raise ValueError('client_email is not a valid email')
+
+    total_amount = str(row.get('total_amount', '') or '').strip()
+    deposit_paid = str(row.get('deposit_paid', '') or '').strip().lower() in ('1', 'true', 'yes')
+
+    values = {
+        'venue_id': venue_id,
+        'selected_hall_id': hall_id,
+        'client_name': required('client_name'),
+        'client_email': email,
+        'client_phone': required('client_phone'),
+        'event_type': required('event_type'),
+        'event_date': event_date,
+        'guest_count': guest_count,
+        'total_amount': int(float(total_amount)) if total_amount else None,
+        'deposit_paid': deposit_paid,
+        'status': status,
+        'special_requests': str(row.get('special_requests', '') or '') or None,
+        'created_at': datetime.utcnow(),
+    }
+    booking_id = str(row.get('id', '') or '').strip()
+    if booking_id:
+        try:
+            values['id'] = int(float(booking_id))
+        except ValueError:
+            raise ValueError('id must be a number (leave it empty to add a new booking)')
+        del values['created_at']
+    return values
+
+@routes.route('/admin/bookings/import', methods=['POST'])
+@admin_required
+def import_bookings():
+    """Bulk insert or update bookings from an uploaded CSV/XLSX in the export format.
+
+    Rows with an empty id add new bookings; rows keeping an exported id
+    update that booking, so a re-imported export doesn't duplicate it.
+    Invalid rows are skipped and reported; valid rows are written in
+    batches of BOOKING_IMPORT_BATCH_SIZE (or ?batch_size=) with one
+    commit per batch.
+    """
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'upload a CSV or XLSX file in the "file" field'}), 400
+
+    batch_size = request.args.get('batch_size', type=int) or current_app.config['BOOKING_IMPORT_BATCH_SIZE']
+    halls_by_venue = {venue_id: set() for (venue_id,) in db.session.execute(db.select(Venue.id))}
+    for hall_id, venue_id in db.session.execute(db.select(Hall.id, Hall.venue_id)):
+        halls_by_venue.setdefault(venue_id, set()).add(hall_id)
+
+    inserted = updated = 0
+    errors = []
+    batch = []
+
+    def report(line, message):
+        if len(errors) < 100:
+            errors.append({'row': line, 'error': message})
+
+    def flush():
+        nonlocal inserted, updated
+        if not batch:
+            return
+        ids = [values['id'] for _, values in batch if 'id' in values]
+        existing = set(db.session.scalars(db.select(Booking.id).where(Booking.id.in_(ids)))) if ids else set()
+        inserts, updates = [], []
+        for line, values in batch:
+            if 'id' not in values:
+                inserts.append(values)
+            elif values['id'] in existing:
+                updates.append(values)
+            else:
+                report(line, f"booking {values['id']} does not exist (leave id empty to add a new booking)")
+        if inserts:
+            db.session.execute(db.insert(Booking), inserts)
+        if updates:
+            # ORM bulk UPDATE by primary key: one executemany for the batch
+            db.session.execute(db.update(Booking), updates)
+        db.session.commit()
+        inserted += len(inserts)
+        updated += len(updates)
+        batch.clear()
+
+    try:
+        # Header is row 1, so data rows start at 2
+        for line, row in enumerate(exports.read_rows(upload), start=2):
+            try:
+                batch.append((line, _booking_from_import_row(row, halls_by_venue)))
+            except ValueError as e:
+                report(line, str(e))
+                continue
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    except Exception as e:
+        db.session.rollback()
+        log.exception('Booking import failed after %s rows', inserted + updated)
+        return jsonify({'error': f'import stopped: {e}', 'inserted': inserted, 'updated': updated,
+                        'errors': errors}), 400
+
+    return jsonify({'inserted': inserted, 'updated': updated, 'errors': errors, 'batch_size': batch_size})
+
+@job_queue.task('sweep_bookings')
+def sweep_bookings():
+    """Periodic job: move stale bookings forward with set-based UPDATEs.
+
+    - pending bookings never paid within PENDING_BOOKING_TTL_HOURS, or whose
+      date has passed, are cancelled
+    - confirmed bookings whose event date has passed become completed
+    """
+    today = date.today()
+    stale_before = datetime.utcnow() - timedelta(hours=current_app.config['PENDING_BOOKING_TTL_HOURS'])
+
+    cancelled = db.session.execute(
+        db.update(Booking)
+        .where(Booking.status == 'pending',
+               db.or_(Booking.created_at < stale_before, Booking.event_date < today))
+        .values(status='cancelled')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    completed = db.session.execute(
+        db.update(Booking)
+        .where(Booking.status == 'confirmed', Booking.event_date < today)
+        .values(status='completed')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    if cancelled or completed:
+        log.info('Booking sweep: %s cancelled, %s completed', cancelled, completed)
+    return cancelled, completed
+
+@job_queue.task('reconcile_invitation_counters')
+def reconcile_invitation_counters():
+    """Periodic job: recount RSVPs per invitation and repair any drifted counters"""
+    counters = db.select(Invitation.id, Invitation.invited_count, Invitation.attending_count,
+                         Invitation.declined_count, Invitation.headcount)
+    # Read and repair in one write transaction, so an RSVP committed between the
+    # recount and the UPDATE can't be overwritten
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(db.text('BEGIN IMMEDIATE'))
+    else:
+        counters = counters.with_for_update()
+    invitations = db.session.execute(counters).all()
+    actual = invitation_rsvp_stats()
+
+    repairs = []
+    for row in invitations:
+        stats = actual.get(row.id) or {'total_invited': 0, 'attending': 0, 'not_attending': 0, 'total_attending': 0}
+        expected = (stats['total_invited'], stats['attending'], stats['not_attending'], stats['total_attending'])
+        if expected != tuple(row[1:]):
+            repairs.append({'id': row.id, 'invited_count': expected[0], 'attending_count': expected[1],
+                            'declined_count': expected[2], 'headcount': expected[3]})
+    if repairs:
+        db.session.execute(db.update(Invitation), repairs)
+        log.warning('Repaired RSVP counters on %s invitation(s)', len(repairs))
+    db.session.commit()
+    return len(repairs)
+
+# Migration that matches the tables older `python app.py` runs created with db.create_all()
+BASELINE_REVISION = '4fd5823a2a5b'
+
 # Initialize database
-def create_tables():
-    with app.app_context():
-        db.create_all()
-        
-        # Add sample data if database is empty
-        if Venue.query.count() == 0:
-            add_sample_data()
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create the schema on a new database, or bring an existing one up to date."""
+    from flask_migrate import stamp, upgrade
+
+    tables = db.inspect(db.engine).get_table_names()
+    if not tables:
+        upgrade()
+        click.echo('Database created.')
+        return
+    if 'alembic_version' not in tables:
+        # Made before migrations existed: it has the baseline tables but no record of them
+        click.echo(f'Existing database without migration history; marking it as {BASELINE_REVISION}.')
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+    click.echo('Database upgraded.')
+
+@click.command('seed')
+@with_appcontext
+def seed_command():
+    """Add the sample venues, halls, hosts and musicians to an empty database."""
+    if Venue.query.count():
+        click.echo('The database already has venues; nothing to seed.')
+        return
+    add_sample_data()
+    click.echo('Sample data added.')
 
 def add_sample_data():
     # Sample venues
@@ -1234,7 +2159,7 @@ def add_sample_data():
 
 # ========== INVITATION SYSTEM ROUTES ==========
 
-@app.route('/booking/<int:booking_id>/create-invitation', methods=['GET', 'POST'])
+@routes.route('/booking/<int:booking_id>/create-invitation', methods=['GET', 'POST'])
 def create_invitation(booking_id):
     """Create invitation for a booking"""
     booking = Booking.query.get_or_404(booking_id)
@@ -1276,29 +2201,47 @@ def create_invitation(booking_id):
     return render_template('create_invitation.html', booking=booking, form=form)
 
 
-@app.route('/invitation/<token>')
+@routes.route('/invitation/<token>')
+@session_router.read_only
 def invitation_preview(token):
     """Preview invitation (for host to see)"""
+    from flask import session
+    
     invitation = Invitation.query.filter_by(unique_token=token).first_or_404()
     booking = invitation.booking
     venue = booking.venue
     hall = booking.selected_hall
     
-    total_invited = InvitedGuest.query.filter_by(invitation_id=invitation.id).count()
-    attending = InvitedGuest.query.filter_by(invitation_id=invitation.id, rsvp_status='attending').count()
-    not_attending = InvitedGuest.query.filter_by(invitation_id=invitation.id, rsvp_status='not_attending').count()
+    stats = invitation_counters(invitation)
+    total_invited = stats['total_invited']
+    attending = stats['attending']
+    not_attending = stats['not_attending']
+    total_attending = stats['total_attending']
+    pending = (db.session.query(db.func.count(InvitedGuest.id))
+               .filter_by(invitation_id=invitation.id, rsvp_status='pending')
+               .scalar())
     
-    total_attending = db.session.query(
-        db.func.sum(InvitedGuest.plus_one + 1)
-    ).filter(
-        InvitedGuest.invitation_id == invitation.id,
-        InvitedGuest.rsvp_status == 'attending'
-    ).scalar() or 0
-    
-    guests = InvitedGuest.query.filter_by(invitation_id=invitation.id).order_by(InvitedGuest.created_at.desc()).all()
+    guest_filters = {
+        'status': request.args.get('status', '').strip(),
+        'q': request.args.get('q', '').strip(),
+    }
+    try:
+        guests, next_cursor = guest_list_page(
+            invitation.id,
+            rsvp_status=guest_filters['status'] or None,
+            name_prefix=guest_filters['q'] or None,
+            cursor=request.args.get('cursor') or None,
+            limit=current_app.config['GUEST_PAGE_SIZE']
+        )
+    except ValueError:
+        return redirect(url_for('invitation_preview', token=token, **{k: v for k, v in guest_filters.items() if v}))
     invitation_link = url_for('guest_rsvp_page', token=token, _external=True)
+    # Importing contacts and downloading personal links is for the booking owner only
+    is_owner = booking.user_id is not None and session.get('user_id') == booking.user_id
     
     return render_template('invitation_preview.html', 
+                         live_event_id=live_events.last_event_id(invitation.id),
+                         is_owner=is_owner,
                          invitation=invitation,
                          booking=booking,
                          venue=venue,
@@ -1308,60 +2251,441 @@ def invitation_preview(token):
                          attending=attending,
                          not_attending=not_attending,
                          total_attending=total_attending,
-                         guests=guests)
+                         pending=pending,
+                         guests=guests,
+                         next_cursor=next_cursor,
+                         guest_filters=guest_filters)
 
 
-@app.route('/rsvp/<token>', methods=['GET', 'POST'])
-def guest_rsvp_page(token):
-    """Public RSVP page for guests"""
-    print(f"RSVP route called with token: {token}")
-    print(f"Request method: {request.method}")
-    
-    invitation = Invitation.query.filter_by(unique_token=token).first_or_404()
+@routes.route('/invitation/<token>/guests')
+@session_router.read_only
+def invitation_guests_json(token):
+    """JSON guest list page: ?status=, ?q= (name prefix), ?cursor=, ?limit="""
+    invitation_id = db.session.query(Invitation.id).filter_by(unique_token=token).scalar()
+    if invitation_id is None:
+        abort(404)
+
+    limit = min(max(request.args.get('limit', current_app.config['GUEST_PAGE_SIZE'], type=int), 1), 200)
+    try:
+        rows, next_cursor = guest_list_page(
+            invitation_id,
+            rsvp_status=request.args.get('status') or None,
+            name_prefix=request.args.get('q') or None,
+            cursor=request.args.get('cursor') or None,
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'guests': [guest_row_json(row) for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+@routes.route('/invitation/<token>/export.<any(csv, xlsx):export_format>')
+@session_router.read_only
+def export_guest_list(token, export_format):
+    """Stream the guest list for caterers; ?status= filters, ?summary=1 gives the CSV rollup (booking owner only)"""
+    if owned_invitation_id(token) is None:
+        flash('Please log in to manage your guest list.', 'warning')
+        return redirect(url_for('profile'))
+    invitation, booking, _, _ = get_invitation_bundle_or_404(token)
+    summary = [('metric', 'value')] + guest_export_summary(invitation.id)
+
+    stmt = (db.select(
+                InvitedGuest.name, InvitedGuest.phone, InvitedGuest.email, InvitedGuest.rsvp_status,
+                db.func.coalesce(InvitedGuest.plus_one, 0),
+                db.case((InvitedGuest.rsvp_status == 'attending', db.func.coalesce(InvitedGuest.plus_one, 0) + 1),
+                        else_=0),
+                InvitedGuest.dietary_restrictions, InvitedGuest.message_to_host, InvitedGuest.responded_at)
+            .where(InvitedGuest.invitation_id == invitation.id)
+            .order_by(InvitedGuest.created_at, InvitedGuest.id))
+    if request.args.get('status'):
+        stmt = stmt.where(InvitedGuest.rsvp_status == request.args['status'])
+
+    def rows():
+        result = db.session.execute(stmt, execution_options={'yield_per': current_app.config['EXPORT_YIELD_PER']})
+        for row in result:
+            yield ['' if value is None else value for value in row]
+
+    name = f"guest_list_{booking.event_date:%Y%m%d}"
+    if export_format == 'xlsx':
+        body = exports.iter_xlsx([
+            ('Guests', GUEST_EXPORT_COLUMNS, rows()),
+            ('Summary', summary[0], summary[1:]),
+        ])
+        mimetype = exports.XLSX_MIMETYPE
+    elif request.args.get('summary'):
+        body = exports.iter_csv(summary[0], summary[1:])
+        mimetype, name = exports.CSV_MIMETYPE, name + '_summary'
+    else:
+        body = exports.iter_csv(GUEST_EXPORT_COLUMNS, rows())
+        mimetype = exports.CSV_MIMETYPE
+
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={name}.{export_format}'})
+
+
+def _cell_text(value):
+    # Spreadsheet cells holding phone numbers come back as numbers
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() if value is not None else ''
+
+def _guest_contacts(upload, pasted):
+    """Yield (name, phone, email) from an uploaded CSV/XLSX and/or pasted lines.
+
+    Files need a 'name' column and may have 'phone' and 'email'. Pasted
+    lines are 'Name, phone, email' (comma, semicolon or tab separated, in
+    any order after the name).
+    """
+    if upload and upload.filename:
+        for row in exports.read_rows(upload):
+            yield _cell_text(row.get('name')), _cell_text(row.get('phone')), _cell_text(row.get('email'))
+    for line in (pasted or '').splitlines():
+        parts = [part.strip() for part in re.split(r'[,;\t]', line) if part.strip()]
+        if not parts:
+            continue
+        name, phone, email = parts[0], '', ''
+        for part in parts[1:]:
+            if '@' in part:
+                email = part
+            elif re.search(r'\d', part):
+                phone = part
+        yield name, phone, email
+
+def _guest_contact_key(name, phone, email):
+    # The same person pasted twice: match on phone digits, then email, then name
+    digits = re.sub(r'\D', '', phone or '')
+    if digits:
+        return 'phone', digits[-10:]
+    if email:
+        return 'email', email.lower()
+    return 'name', (name or '').casefold()
+
+def pre_invite_guests(invitation_id, contacts, batch_size=500):
+    """Insert pending guests with their own RSVP tokens, skipping people already on the list.
+
+    Rows go in with one multi-row INSERT and one commit per batch, and the
+    invitation's invited counter is bumped in the same transaction.
+    Returns (added, duplicates, skipped).
+    """
+    seen = {_guest_contact_key(*row) for row in db.session.execute(
+        db.select(InvitedGuest.name, InvitedGuest.phone, InvitedGuest.email)
+        .where(InvitedGuest.invitation_id == invitation_id))}
+    added = duplicates = skipped = 0
+    batch = []
+
+    def flush():
+        nonlocal added
+        if batch:
+            db.session.execute(db.insert(InvitedGuest), batch)
+            db.session.execute(
+                db.update(Invitation)
+                .where(Invitation.id == invitation_id)
+                .values(invited_count=Invitation.invited_count + len(batch))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            added += len(batch)
+            batch.clear()
+
+    for name, phone, email in contacts:
+        if not name or len(name) > 100 or len(phone) > 20 or len(email) > 100:
+            skipped += 1
+            continue
+        key = _guest_contact_key(name, phone, email)
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        batch.append({
+            'invitation_id': invitation_id,
+            'name': name,
+            'phone': phone or None,
+            'email': email or None,
+            'plus_one': 0,
+            'rsvp_status': 'pending',
+            'token': secrets.token_urlsafe(16),
+        })
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return added, duplicates, skipped
+
+
+def owned_invitation_id(token):
+    """Id of the invitation for ``token`` if the logged-in user owns its booking, else None.
+
+    The token is shared with every guest, so it is not enough for pages that
+    reveal other guests' personal links.
+    """
+    from flask import session
+
+    row = (db.session.query(Invitation.id, Booking.user_id)
+           .join(Booking, Invitation.booking_id == Booking.id)
+           .filter(Invitation.unique_token == token)
+           .first())
+    if row is None:
+        abort(404)
+    if row.user_id is None or session.get('user_id') != row.user_id:
+        return None
+    return row.id
+
+
+@routes.route('/invitation/<token>/guests/import', methods=['POST'])
+@rate_limiter.limit('guest_import')
+def import_guests(token):
+    """Pre-invite guests from a contact list (CSV/XLSX upload or pasted lines)"""
+    invitation_id = owned_invitation_id(token)
+    if invitation_id is None:
+        flash('Please log in to manage your guest list.', 'warning')
+        return redirect(url_for('profile'))
+    try:
+        added, duplicates, skipped = pre_invite_guests(
+            invitation_id,
+            _guest_contacts(request.files.get('file'), request.form.get('contacts')),
+            batch_size=current_app.config['GUEST_IMPORT_BATCH_SIZE']
+        )
+    except Exception:
+        db.session.rollback()
+        log.exception('Guest import failed for invitation %s', invitation_id)
+        flash('Could not read the contact list. Upload a CSV/XLSX with a "name" column or paste one guest per line.', 'error')
+        return redirect(url_for('invitation_preview', token=token))
+
+    message = f'Added {added} guest(s) to the list.'
+    if duplicates:
+        message += f' {duplicates} already on the list.'
+    if skipped:
+        message += f' {skipped} line(s) skipped (missing name or too long).'
+    flash(message, 'success' if added else 'info')
+    return redirect(url_for('invitation_preview', token=token))
+
+
+@routes.route('/invitation/<token>/guests/links.csv')
+@session_router.read_only
+def export_guest_links(token):
+    """Personal RSVP links of pre-invited guests, for sending them out (booking owner only)"""
+    invitation_id = owned_invitation_id(token)
+    if invitation_id is None:
+        flash('Please log in to manage your guest list.', 'warning')
+        return redirect(url_for('profile'))
+    stmt = (db.select(InvitedGuest.name, InvitedGuest.phone, InvitedGuest.email, InvitedGuest.rsvp_status,
+                      InvitedGuest.token)
+            .where(InvitedGuest.invitation_id == invitation_id, InvitedGuest.token.is_not(None))
+            .order_by(InvitedGuest.created_at, InvitedGuest.id))
+    if request.args.get('status'):
+        stmt = stmt.where(InvitedGuest.rsvp_status == request.args['status'])
+
+    def rows():
+        result = db.session.execute(stmt, execution_options={'yield_per': current_app.config['EXPORT_YIELD_PER']})
+        for name, phone, email, rsvp_status, guest_token in result:
+            link = url_for('guest_rsvp_page', token=token, guest_token=guest_token, _external=True)
+            yield [name, phone or '', email or '', rsvp_status, link]
+
+    body = exports.iter_csv(['name', 'phone', 'email', 'rsvp_status', 'rsvp_link'], rows())
+    return Response(stream_with_context(body), mimetype=exports.CSV_MIMETYPE,
+                    headers={'Content-Disposition': 'attachment; filename=guest_links.csv'})
+
+
+@routes.route('/invitation/<token>/events')
+def invitation_events(token):
+    """Server-Sent Events stream of RSVP deltas for the live invitation dashboard"""
+    invitation = get_invitation_bundle_or_404(token).invitation
+    # EventSource sends Last-Event-ID on reconnect; the page passes the id it was rendered at
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id:
+        stream = live_events.listen(invitation.id, last_event_id)
+    else:
+        stream = live_events.listen(invitation.id, request.args.get('last_event_id'), strict=False)
+    return Response(stream,
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def load_invitation_bundle(token):
+    """Build the immutable invitation/booking/venue/hall bundle for a token (cache loader)"""
+    invitation = (Invitation.query
+                  .options(db.joinedload(Invitation.booking).joinedload(Booking.venue),
+                           db.joinedload(Invitation.booking).joinedload(Booking.selected_hall))
+                  .filter_by(unique_token=token)
+                  .first())
+    if invitation is None:
+        return None
     booking = invitation.booking
     venue = booking.venue
     hall = booking.selected_hall
+    return InvitationBundle(
+        invitation=InvitationView(invitation.id, invitation.booking_id, invitation.title, invitation.message,
+                                  invitation.event_time, invitation.dress_code, invitation.additional_info,
+                                  invitation.unique_token),
+        booking=BookingView(booking.id, booking.event_date, booking.event_type),
+        venue=VenueView(venue.id, venue.name, venue.address, venue.description, venue.district,
+                        venue.email, venue.phone),
+        hall=HallView(hall.id, hall.name, hall.description) if hall else None,
+    )
+
+def get_invitation_bundle_or_404(token):
+    bundle = invitation_bundles.get(token)
+    if bundle is None:
+        abort(404)
+    return bundle
+
+@db.event.listens_for(Booking, 'after_update')
+@db.event.listens_for(Booking, 'after_delete')
+@db.event.listens_for(Invitation, 'after_update')
+@db.event.listens_for(Invitation, 'after_delete')
+def _mark_invitation_bundle_stale(mapper, connection, target):
+    # Dropped from the cache only once the change is committed, see below
+    session = db.inspect(target).session
+    if session is not None:
+        key = ('booking', target.id) if isinstance(target, Booking) else ('token', target.unique_token)
+        session.info.setdefault('stale_invitation_bundles', set()).add(key)
+
+@db.event.listens_for(db.orm.Session, 'after_commit')
+def _drop_stale_invitation_bundles(session):
+    for kind, key in session.info.pop('stale_invitation_bundles', ()):
+        if kind == 'booking':
+            invitation_bundles.invalidate_booking(key)
+        else:
+            invitation_bundles.invalidate(key)
+
+@db.event.listens_for(db.orm.Session, 'after_rollback')
+def _forget_stale_invitation_bundles(session):
+    session.info.pop('stale_invitation_bundles', None)
+
+def write_rsvp_batch(items):
+    """Write a batch of validated RSVPs with one commit; returns the guest ids.
+
+    Items carrying a guest_token answer for a pre-invited guest and update
+    that row; the rest insert a new guest.
+    """
+    try:
+        now = datetime.utcnow()
+        tokens = [item['guest_token'] for item in items if item.get('guest_token')]
+        invited = {}
+        if tokens:
+            invited = {guest.token: guest for guest in InvitedGuest.query.filter(InvitedGuest.token.in_(tokens))}
+        guests = []
+        for item in items:
+            item = dict(item)
+            guest = invited.get(item.pop('guest_token', None))
+            if guest is not None and guest.invitation_id == item['invitation_id']:
+                old = (guest.rsvp_status, guest.plus_one)
+                for field, value in item.items():
+                    setattr(guest, field, value)
+                guest.responded_at = now
+                record_rsvp_counts(guest.invitation_id, old=old, new=(item['rsvp_status'], item['plus_one']))
+            else:
+                guest = InvitedGuest(email=None, responded_at=now, **item)
+                db.session.add(guest)
+                record_rsvp_counts(item['invitation_id'], new=(item['rsvp_status'], item['plus_one']))
+            guests.append(guest)
+        db.session.flush()
+        guest_ids = [guest.id for guest in guests]
+        guest_rows = [(guest.invitation_id, guest_row_json(guest)) for guest in guests]
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    try:
+        publish_rsvp_events(guest_rows)
+    except Exception:
+        # The RSVPs are committed; a dashboard that missed them catches up on reload
+        rsvp_log.exception('Could not publish live RSVP events')
+    return guest_ids
+
+def publish_rsvp_events(guest_rows):
+    """Push committed RSVPs and the new counters to open live dashboards"""
+    invitation_ids = {invitation_id for invitation_id, _ in guest_rows if live_events.is_open(invitation_id)}
+    if not invitation_ids:
+        return
+    for invitation_id, row in guest_rows:
+        live_events.publish(invitation_id, 'guest', row)
+    counters = (db.session.query(Invitation.id, Invitation.invited_count, Invitation.attending_count,
+                                 Invitation.declined_count, Invitation.headcount)
+                .filter(Invitation.id.in_(invitation_ids))
+                .all())
+    for invitation_id, invited, attending, declined, headcount in counters:
+        live_events.publish(invitation_id, 'counters', {
+            'total_invited': invited,
+            'attending': attending,
+            'not_attending': declined,
+            'total_attending': headcount,
+        })
+
+
+@routes.route('/rsvp/<token>', methods=['GET', 'POST'], defaults={'guest_token': None})
+@routes.route('/rsvp/<token>/g/<guest_token>', methods=['GET', 'POST'])
+@rate_limiter.limit('rsvp')
+@session_router.read_only(methods=('GET', 'HEAD'))
+def guest_rsvp_page(token, guest_token):
+    """Public RSVP page for guests; /g/<guest_token> is a pre-invited guest's personal link"""
+    invitation, booking, venue, hall = get_invitation_bundle_or_404(token)
+    guest = None
+    if guest_token:
+        guest = (db.session.query(InvitedGuest.name, InvitedGuest.phone, InvitedGuest.rsvp_status)
+                 .filter_by(token=guest_token, invitation_id=invitation.id)
+                 .first())
+        if guest is None:
+            abort(404)
     
     if request.method == 'POST':
-        print("POST request received")
-        print(f"Form data: {dict(request.form)}")
-        
         # Get form data directly
         name = request.form.get('name', '').strip()
         phone = request.form.get('phone', '').strip()
         rsvp_status = request.form.get('rsvp_status', '')
-        plus_one = int(request.form.get('plus_one', 0) or 0)
         dietary_restrictions = request.form.get('dietary_restrictions', '').strip()
         message_to_host = request.form.get('message_to_host', '').strip()
+        try:
+            plus_one = int(request.form.get('plus_one', 0) or 0)
+        except ValueError:
+            plus_one = None
         
-        print(f"Parsed data: name={name}, phone={phone}, rsvp_status={rsvp_status}, plus_one={plus_one}")
-        
-        # Simple validation
+        # Same rules as GuestRSVPForm, checked here so a bad RSVP never reaches the writer's batch
+        error = None
         if not name or not rsvp_status:
-            flash('Please fill in your name and select your attendance status.', 'error')
+            error = 'Please fill in your name and select your attendance status.'
+        elif rsvp_status not in ('attending', 'not_attending'):
+            error = 'Please select your attendance status.'
+        elif plus_one is None or not 0 <= plus_one <= 5:
+            error = 'Number of additional guests must be between 0 and 5.'
+        elif len(name) > 100 or len(phone) > 20 or len(dietary_restrictions) > 200:
+            error = 'Please shorten your name, phone number or dietary restrictions.'
+        if error:
+            flash(error, 'error')
             return render_template('guest_rsvp_page.html', 
                                  invitation=invitation,
                                  booking=booking,
                                  venue=venue,
-                                 hall=hall)
+                                 hall=hall,
+                                 guest=guest,
+                                 guest_token=guest_token)
         
         try:
-            # Create new RSVP
-            guest = InvitedGuest(
-                invitation_id=invitation.id,
-                name=name,
-                email=None,
-                phone=phone,
-                plus_one=plus_one,
-                rsvp_status=rsvp_status,
-                dietary_restrictions=dietary_restrictions,
-                message_to_host=message_to_host,
-                responded_at=datetime.utcnow()
-            )
-            db.session.add(guest)
-            db.session.commit()
+            # Hand our pooled connection (if a cache miss took one) back before waiting,
+            # so a burst of waiting requests can't starve the writer thread of connections
+            db.session.rollback()
+            # Queue the RSVP for the group-commit writer and wait until it is durable
+            future = rsvp_committer.submit({
+                'invitation_id': invitation.id,
+                'name': name,
+                'phone': phone,
+                'plus_one': plus_one,
+                'rsvp_status': rsvp_status,
+                'dietary_restrictions': dietary_restrictions,
+                'message_to_host': message_to_host,
+                'guest_token': guest_token,
+            })
+            # On timeout the RSVP is withdrawn unless already being written, so a retry can't duplicate it
+            guest_id = rsvp_committer.result(future, timeout=current_app.config['RSVP_SUBMIT_TIMEOUT'])
             
-            print(f"Guest created successfully! ID: {guest.id}")
+            rsvp_log.info('RSVP submitted', extra={
+                'event': 'rsvp.submitted', 'invitation_id': invitation.id, 'guest_id': guest_id,
+                'rsvp_status': rsvp_status, 'plus_one': plus_one, 'pre_invited': bool(guest_token),
+            })
             
             if rsvp_status == 'attending':
                 flash('Thank you for confirming your attendance! We look forward to seeing you! 🎉', 'success')
@@ -1370,24 +2694,24 @@ def guest_rsvp_page(token):
             
             return redirect(url_for('rsvp_confirmation', token=token))
             
-        except Exception as e:
-            print(f"Database error: {e}")
-            db.session.rollback()
+        except Exception:
+            rsvp_log.exception('RSVP submission failed for invitation %s', invitation.id)
             flash('There was an error submitting your RSVP. Please try again.', 'error')
     
     return render_template('guest_rsvp_page.html', 
                          invitation=invitation,
                          booking=booking,
                          venue=venue,
-                         hall=hall)
+                         hall=hall,
+                         guest=guest,
+                         guest_token=guest_token)
 
 
-@app.route('/rsvp/<token>/confirmation')
+@routes.route('/rsvp/<token>/confirmation')
+@session_router.read_only
 def rsvp_confirmation(token):
     """Thank you page after RSVP submission"""
-    invitation = Invitation.query.filter_by(unique_token=token).first_or_404()
-    booking = invitation.booking
-    venue = booking.venue
+    invitation, booking, venue, _ = get_invitation_bundle_or_404(token)
     
     return render_template('rsvp_confirmation.html', 
                          invitation=invitation,
@@ -1395,5 +2719,5 @@ def rsvp_confirmation(token):
                          venue=venue)
 
 if __name__ == '__main__':
-    create_tables()
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # On a fresh checkout: flask --app app init-db && flask --app app seed
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,129 @@
+"""Fingerprinted URLs for the CSS and JS under the static folder.
+
+At startup every asset is hashed and gzipped once, and templates link to
+it through ``asset_url``::
+
+    <link rel="stylesheet" href="{{ asset_url('css/style.css') }}">
+
+which renders ``/assets/css/style.<hash>.css``. The name changes whenever
+the file does, so responses are cached by browsers for a year without
+revalidation, and a deploy can never leave a stale stylesheet behind.
+Clients that accept gzip get the precompressed bytes.
+
+A request for an outdated hash (a page rendered before a deploy) still
+gets the current file, just without the long cache lifetime.
+"""
+import gzip
+import hashlib
+import os
+import re
+import threading
+from collections import namedtuple
+
+from flask import Response, abort, request, url_for
+
+ASSET_EXTENSIONS = ('.css', '.js')
+MIMETYPES = {'.css': 'text/css; charset=utf-8', '.js': 'text/javascript; charset=utf-8'}
+
+Asset = namedtuple('Asset', 'filename digest mtime data gzipped')
+
+_FINGERPRINT_RE = re.compile(r'\.([0-9a-f]{12})(\.[^./]+)$')
+
+
+class AssetManifest:
+    """Content hashes and gzipped copies of the static CSS/JS"""
+
+    def __init__(self, static_folder, auto_reload=False):
+        self.static_folder = static_folder
+        self.max_age = 365 * 24 * 3600
+        # Re-hash files whose mtime changed (debug mode), instead of only at startup
+        self.auto_reload = auto_reload
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def scan(self):
+        """Hash and compress every asset under the static folder"""
+        assets = {}
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                if name.endswith(ASSET_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                    assets[filename] = self._load(filename, path)
+        with self._lock:
+            self._assets = assets
+
+    def _load(self, filename, path):
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, 'rb') as f:
+            data = f.read()
+        gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+        return Asset(filename, hashlib.sha1(data).hexdigest()[:12], mtime,
+                     data, gzipped if len(gzipped) < len(data) else None)
+
+    def get(self, filename):
+        asset = self._assets.get(filename)
+        if asset is not None and self.auto_reload:
+            path = os.path.join(self.static_folder, filename)
+            try:
+                changed = os.stat(path).st_mtime_ns != asset.mtime
+            except OSError:
+                changed = False
+            if changed:
+                asset = self._load(filename, path)
+                with self._lock:
+                    self._assets[filename] = asset
+        return asset
+
+    def url(self, filename, **values):
+        """Like ``url_for('static', filename=...)``, but with the content hash in the name"""
+        asset = self.get(filename)
+        if asset is None:
+            return url_for('static', filename=filename, **values)
+        stem, ext = os.path.splitext(filename)
+        return url_for('asset', filename=f'{stem}.{asset.digest}{ext}', **values)
+
+    def serve(self, filename):
+        match = _FINGERPRINT_RE.search(filename)
+        if match is None:
+            abort(404)
+        asset = self.get(filename[:match.start()] + match.group(2))
+        if asset is None:
+            abort(404)
+
+        if asset.gzipped is not None and 'gzip' in request.accept_encodings:
+            response = Response(asset.gzipped, mimetype=MIMETYPES[match.group(2)])
+            response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(f'{asset.digest}-gz')
+        else:
+            response = Response(asset.data, mimetype=MIMETYPES[match.group(2)])
+            response.set_etag(asset.digest)
+        response.vary.add('Accept-Encoding')
+        if match.group(1) == asset.digest:
+            response.cache_control.public = True
+            response.cache_control.max_age = self.max_age
+            response.cache_control.immutable = True
+        else:
+            # Outdated hash: serve the current file, but let it be revalidated
+            response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def stats(self):
+        with self._lock:
+            assets = list(self._assets.values())
+        return {
+            asset.filename: {'digest': asset.digest, 'bytes': len(asset.data),
+                             'gzipped': len(asset.gzipped) if asset.gzipped else None}
+            for asset in assets
+        }
+
+
+def init_app(app):
+    """Hash ``app``'s static CSS/JS and serve them under /assets with an ``asset_url`` helper"""
+    manifest = AssetManifest(app.static_folder,
+                             auto_reload=app.debug or bool(app.config.get('TEMPLATES_AUTO_RELOAD')))
+    manifest.scan()
+    app.add_url_rule('/assets/<path:filename>', 'asset', manifest.serve)
+    app.jinja_env.globals['asset_url'] = manifest.url
+    app.extensions['assets'] = manifest
+    return manifest
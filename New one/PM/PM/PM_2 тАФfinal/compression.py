@@ -0,0 +1,177 @@
+"""Gzip compression of dynamic responses.
+
+The RSVP and invitation pages carry several hundred lines of inline CSS
+and JS each and compress to roughly a fifth of their size. The middleware
+wraps ``app.wsgi_app`` and compresses a response when:
+
+* the client sends ``Accept-Encoding: gzip``,
+* the content type is text-like (HTML, CSS, JS, JSON, CSV, XML, SVG),
+* it isn't already encoded, partial, ``no-transform`` or an SSE stream,
+* and its Content-Length, when known, is at least COMPRESS_MIN_SIZE.
+
+Streamed responses stay streamed: each chunk goes through one compressor
+and whatever it emits is passed on, so memory use stays flat.
+
+Settings::
+
+    COMPRESS_ENABLED   turn the middleware off entirely
+    COMPRESS_LEVEL     zlib level 1-9 (default 6)
+    COMPRESS_MIN_SIZE  bytes below which a response is sent as is (default 500)
+
+``init_app(app)`` wraps one app's ``wsgi_app`` in its own middleware,
+found afterwards under ``app.extensions['compression']``. Its ``stats()``
+reports bytes in/out and the CPU time spent compressing, to tune the
+level against.
+"""
+import collections
+import threading
+import time
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+COMPRESSIBLE_TYPES = {
+    'application/javascript', 'application/json', 'application/xml',
+    'image/svg+xml', 'text/csv', 'text/css', 'text/html', 'text/javascript',
+    'text/plain', 'text/xml',
+}
+
+
+class GzipMiddleware:
+    """WSGI middleware compressing text responses for clients that accept gzip"""
+
+    def __init__(self, wsgi_app, level=6, min_size=500, enabled=True):
+        self.wsgi_app = wsgi_app
+        self.level = level
+        self.min_size = min_size
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.counts = collections.Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_time = 0.0
+
+    def __call__(self, environ, start_response):
+        if (not self.enabled or environ['REQUEST_METHOD'] == 'HEAD'
+                or not _accepts_gzip(environ.get('HTTP_ACCEPT_ENCODING', ''))):
+            return self.wsgi_app(environ, start_response)
+
+        compress = []
+
+        def gzip_start_response(status, headers, exc_info=None):
+            headers = Headers(headers)
+            reason = self._skip_reason(status, headers)
+            if reason:
+                self._count(reason)
+            else:
+                compress.append(True)
+                headers.remove('Content-Length')
+                headers['Content-Encoding'] = 'gzip'
+                vary = headers.get('Vary')
+                if not vary:
+                    headers['Vary'] = 'Accept-Encoding'
+                elif 'accept-encoding' not in vary.lower():
+                    headers['Vary'] = f'{vary}, Accept-Encoding'
+                etag = headers.get('ETag')
+                if etag and not etag.startswith('W/'):
+                    # The compressed bytes differ from the identity ones, so the tag is only weakly equal
+                    headers['ETag'] = f'W/{etag}'
+            return start_response(status, headers.to_wsgi_list(), exc_info)
+
+        body = self.wsgi_app(environ, gzip_start_response)
+        if not compress:
+            return body
+        return _GzipStream(self, body)
+
+    def _skip_reason(self, status, headers):
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return 'skipped_status'
+        if headers.get('Content-Encoding'):
+            return 'skipped_encoded'
+        mimetype = headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if mimetype not in COMPRESSIBLE_TYPES:
+            return 'skipped_type'
+        if 'no-transform' in headers.get('Cache-Control', ''):
+            return 'skipped_no_transform'
+        length = headers.get('Content-Length')
+        if length is not None and length.isdigit() and int(length) < self.min_size:
+            return 'skipped_small'
+        return None
+
+    def _count(self, key, bytes_in=0, bytes_out=0, cpu_time=0.0):
+        with self._lock:
+            self.counts[key] += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_time += cpu_time
+
+    def stats(self):
+        with self._lock:
+            saved = self.bytes_in - self.bytes_out
+            return {
+                'level': self.level,
+                'min_size': self.min_size,
+                **self.counts,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'bytes_saved': saved,
+                'ratio': round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+                'cpu_ms': round(self.cpu_time * 1000, 1),
+                'kb_saved_per_cpu_ms': round(saved / 1024 / (self.cpu_time * 1000), 1) if self.cpu_time else None,
+            }
+
+
+class _GzipStream:
+    """Response body iterable that compresses the wrapped body chunk by chunk"""
+
+    def __init__(self, middleware, body):
+        self.middleware = middleware
+        self.body = body
+
+    def __iter__(self):
+        # wbits=31: zlib stream with a gzip header and trailer
+        compressor = zlib.compressobj(self.middleware.level, zlib.DEFLATED, 31)
+        bytes_in = bytes_out = 0
+        cpu_time = 0.0
+        try:
+            for chunk in self.body:
+                if not chunk:
+                    continue
+                started = time.thread_time()
+                data = compressor.compress(chunk)
+                cpu_time += time.thread_time() - started
+                bytes_in += len(chunk)
+                if data:
+                    bytes_out += len(data)
+                    yield data
+            started = time.thread_time()
+            data = compressor.flush()
+            cpu_time += time.thread_time() - started
+            bytes_out += len(data)
+            yield data
+        finally:
+            self.middleware._count('compressed', bytes_in, bytes_out, cpu_time)
+
+    def close(self):
+        close = getattr(self.body, 'close', None)
+        if close is not None:
+            close()
+
+
+def _accepts_gzip(header):
+    return parse_accept_header(header)['gzip'] > 0
+
+
+def init_app(app):
+    """Wrap ``app.wsgi_app`` in a GzipMiddleware configured from the app's settings"""
+    middleware = GzipMiddleware(
+        app.wsgi_app,
+        level=app.config.get('COMPRESS_LEVEL', 6),
+        min_size=app.config.get('COMPRESS_MIN_SIZE', 500),
+        enabled=app.config.get('COMPRESS_ENABLED', True),
+    )
+    app.wsgi_app = middleware
+    app.extensions['compression'] = middleware
+    return middleware
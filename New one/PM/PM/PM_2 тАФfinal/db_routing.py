@@ -0,0 +1,105 @@
+"""Route read-only requests to a separate pool of read-only connections.
+
+Views decorated with ``@session_router.read_only`` (listings, detail
+pages, dashboards, exports, the public RSVP page on GET) run their
+queries on a second engine: the primary SQLite file opened with
+``mode=ro``, or SQLALCHEMY_READ_URI when a replica is configured.
+Everything else, and every flush, stays on the primary engine. With WAL, the read-only connections never wait for the
+writer, and their pool (SQLALCHEMY_READ_ENGINE_OPTIONS) is sized
+separately from the write pool.
+
+A read-only request that tries to write - adding or changing objects, or
+running an INSERT/UPDATE/DELETE through the session - raises
+ReadOnlyViolation and is logged, instead of silently taking the write
+lock.
+"""
+import logging
+from functools import partial, wraps
+from urllib.parse import quote
+
+import sqlalchemy as sa
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+import sqlite_setup
+
+log = logging.getLogger('toy_planner.db')
+
+
+class ReadOnlyViolation(RuntimeError):
+    """A write was attempted in a request marked read-only"""
+
+
+class RoutingSession(Session):
+    """Session that reads from the read-only engine when the request is marked read-only"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_only') and not self._flushing:
+            engine = current_app.extensions['db_routing']
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _violation(what):
+    endpoint = request.endpoint if has_request_context() else None
+    log.error('Write attempted in read-only request: %s', what,
+              extra={'event': 'db.read_only_violation', 'endpoint': endpoint})
+    raise ReadOnlyViolation(f'{what} in read-only view {endpoint!r}')
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _guard_flush(session, flush_context, instances):
+    if session.info.get('read_only') and (session.new or session.dirty or session.deleted):
+        _violation('flush of pending changes')
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _guard_execute(orm_execute_state):
+    if orm_execute_state.session.info.get('read_only') and (
+            orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        _violation('INSERT/UPDATE/DELETE statement')
+
+
+class SessionRouter:
+    """Creates each app's read-only engine and marks views as read-only"""
+
+    def init_app(self, app, db):
+        """Create the read-only engine for ``app``; it is kept as ``app.extensions['db_routing']``"""
+        read_engine = None
+        url = app.config.get('SQLALCHEMY_READ_URI')
+        if url is None:
+            with app.app_context():
+                primary = db.engine
+            database = primary.url.database
+            if primary.dialect.name == 'sqlite' and database and database != ':memory:':
+                # SQLite URI filename; the connection can read but never take the write lock
+                url = sa.engine.URL.create('sqlite', database=f'file:{quote(database)}',
+                                           query={'mode': 'ro', 'uri': 'true'})
+        if url:
+            read_engine = sa.create_engine(url, **app.config.get('SQLALCHEMY_READ_ENGINE_OPTIONS', {}))
+            # journal_mode is a property of the file, and read-only connections can't change it
+            sqlite_setup.apply_pragmas(read_engine, {**app.config.get('SQLITE_PRAGMAS', {}), 'journal_mode': None})
+        app.extensions['db_routing'] = read_engine
+        return read_engine
+
+    def read_only(self, view=None, *, methods=None):
+        """Run the view's queries on the read-only engine and reject any write it attempts.
+
+        ``@session_router.read_only(methods=('GET', 'HEAD'))`` does so only
+        for those methods, for a view whose POST writes.
+        """
+        if view is None:
+            return partial(self.read_only, methods=methods)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if methods is None or request.method in methods:
+                # The flag lives on this request's session, so streamed responses keep it too
+                current_app.extensions['sqlalchemy'].session.info['read_only'] = True
+            return view(*args, **kwargs)
+        return wrapper
+
+
+session_router = SessionRouter()
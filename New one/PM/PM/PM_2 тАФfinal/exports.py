@@ -0,0 +1,92 @@
+"""Streaming CSV / XLSX helpers for operator downloads.
+
+Rows come from a generator (usually a ``yield_per`` query over plain
+columns), so an export never holds more than a chunk of rows in memory.
+
+Text cells are written so a spreadsheet never runs them as formulas: a
+guest can type ``=HYPERLINK(...)`` into the RSVP form, and the caterer's
+Excel should show it, not evaluate it.
+"""
+import csv
+import io
+import re
+import tempfile
+
+CSV_MIMETYPE = 'text/csv'  # Werkzeug appends '; charset=utf-8' to text/* types
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# '+7 700 123 4567', '-5': no letters, so nothing to run; keep phone numbers readable
+_PLAIN_NUMBER = re.compile(r'[+-]?[\d\s().-]+')
+
+
+def _safe_cell(value):
+    """Prefix text a spreadsheet would read as a formula with a quote"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not _PLAIN_NUMBER.fullmatch(value):
+        return "'" + value
+    return value
+
+
+def iter_csv(header, rows, chunk_rows=500):
+    """Yield CSV text in chunks of ``chunk_rows`` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens Cyrillic/Kazakh text as UTF-8
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    count = 0
+    for row in rows:
+        writer.writerow([_safe_cell(value) for value in row])
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_xlsx(sheets, chunk_size=64 * 1024):
+    """Build a workbook in openpyxl write-only mode and yield its bytes.
+
+    ``sheets`` is a list of ``(title, header, rows)``. Write-only mode
+    streams rows to disk as they are appended, so memory stays flat; the
+    finished file is then read back in chunks.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for title, header, rows in sheets:
+        ws = wb.create_sheet(title=title)
+        ws.append(list(header))
+        for row in rows:
+            ws.append([_safe_cell(value) for value in row])
+
+    with tempfile.TemporaryFile() as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def read_rows(file_storage):
+    """Read an uploaded CSV or XLSX file as a stream of dicts keyed by header"""
+    filename = (file_storage.filename or '').lower()
+    if filename.endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(file_storage.stream, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else '' for h in next(rows, ())]
+        for values in rows:
+            if values is None or all(v is None for v in values):
+                continue
+            yield {key: ('' if value is None else value) for key, value in zip(header, values)}
+        wb.close()
+    else:
+        text = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+        for row in csv.DictReader(text):
+            yield {(k.strip() if isinstance(k, str) else k): (v.strip() if isinstance(v, str) else v)
+                   for k, v in row.items()}
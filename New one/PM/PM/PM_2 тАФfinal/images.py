@@ -0,0 +1,208 @@
+"""Resized WebP/JPEG derivatives of the venue, host and musician photos.
+
+Originals in static/images are several hundred KB to a few MB, while a
+listing card is ~400px wide. Derivatives are made at IMAGE_WIDTHS and
+cached on disk as ``<content-hash>-<width>.<format>`` under
+IMAGE_CACHE_DIR, so an edited original gets new files and new URLs, and
+the URLs can be cached by browsers forever.
+
+A derivative is generated on its first request. To warm the cache ahead
+of a deploy, build all of them in a process pool::
+
+    flask --app app build-images
+
+Templates use the ``image_srcset`` / ``image_src`` helpers::
+
+    <picture>
+      <source type="image/webp" srcset="{{ image_srcset(venue.image_url, 'webp') }}" sizes="400px">
+      <img src="{{ image_src(venue.image_url) }}" srcset="{{ image_srcset(venue.image_url) }}" sizes="400px">
+    </picture>
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask import abort, current_app, send_file, url_for
+
+FORMATS = {'webp': ('WEBP', 'image/webp'), 'jpeg': ('JPEG', 'image/jpeg')}
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.jfif', '.png', '.webp')
+
+
+def render_derivative(source_path, dest_path, width, fmt, quality=80):
+    """Resize ``source_path`` to ``width`` pixels wide and save it as ``fmt``.
+
+    Module-level so the batch command can run it in worker processes.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        pil_format = FORMATS[fmt][0]
+        if pil_format == 'JPEG' and image.mode != 'RGB':
+            # JPEG has no alpha channel: flatten transparent PNGs onto white
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        tmp_path = f'{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        if pil_format == 'WEBP':
+            image.save(tmp_path, pil_format, quality=quality, method=4)
+        else:
+            image.save(tmp_path, pil_format, quality=quality, optimize=True, progressive=True)
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+class ImagePipeline:
+    """Builds, caches and serves image derivatives for files under the static folder"""
+
+    def __init__(self, static_folder, cache_dir, widths=(320, 640, 960), quality=80):
+        self.static_folder = static_folder
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        # (path, mtime, size) -> (digest, width) of the original
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._building = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _source(self, filename):
+        """(absolute path, digest, original width) or None if it isn't a usable image"""
+        if not filename or not filename.lower().endswith(SOURCE_EXTENSIONS):
+            return None
+        path = os.path.realpath(os.path.join(self.static_folder, filename))
+        if not path.startswith(os.path.realpath(self.static_folder) + os.sep):
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        info = self._sources.get(key)
+        if info is None:
+            from PIL import Image
+
+            with open(path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:16]
+            try:
+                with Image.open(path) as image:
+                    original_width = image.width
+            except OSError:
+                return None
+            info = self._sources[key] = (digest, original_width)
+        return (path,) + info
+
+    def _widths_for(self, original_width):
+        # No upscaling: a small original is offered at its own width instead
+        widths = [w for w in self.widths if w < original_width]
+        if original_width <= self.widths[-1]:
+            widths.append(original_width)
+        return widths
+
+    def src(self, filename, width=None, fmt='jpeg'):
+        """URL of one derivative (default: the largest); falls back to the original file"""
+        source = self._source(filename)
+        if source is None:
+            return url_for('static', filename=filename)
+        widths = self._widths_for(source[2])
+        width = min(widths, key=lambda w: abs(w - width)) if width else widths[-1]
+        return url_for('image_derivative', width=width, fmt=fmt, filename=filename, v=source[1])
+
+    def srcset(self, filename, fmt='jpeg'):
+        """``srcset`` value listing every derivative width of ``filename``"""
+        source = self._source(filename)
+        if source is None:
+            return ''
+        return ', '.join(
+            f"{url_for('image_derivative', width=w, fmt=fmt, filename=filename, v=source[1])} {w}w"
+            for w in self._widths_for(source[2])
+        )
+
+    def derivative_path(self, filename, width, fmt):
+        """Path of a cached derivative, generating it first if needed"""
+        source = self._source(filename)
+        if source is None or width not in self._widths_for(source[2]):
+            return None
+        path, digest, _ = source
+        dest = os.path.join(self.cache_dir, f'{digest}-{width}.{fmt}')
+        if os.path.exists(dest):
+            return dest
+        # One thread renders a given derivative; others wait for it
+        with self._lock:
+            event = self._building.get(dest)
+            owner = event is None
+            if owner:
+                event = self._building[dest] = threading.Event()
+        if not owner:
+            event.wait(30)
+            return dest if os.path.exists(dest) else None
+        try:
+            render_derivative(path, dest, width, fmt, self.quality)
+        finally:
+            with self._lock:
+                self._building.pop(dest, None)
+            event.set()
+        return dest
+
+    def serve(self, width, fmt, filename):
+        path = self.derivative_path(filename, width, fmt)
+        if path is None:
+            abort(404)
+        # The URL carries the content hash (?v=), so the response never goes stale
+        response = send_file(path, mimetype=FORMATS[fmt][1], max_age=365 * 24 * 3600, conditional=True)
+        response.cache_control.immutable = True
+        return response
+
+    def jobs(self, folder='images'):
+        """Every (source, dest, width, fmt) derivative missing from the cache"""
+        base = os.path.join(self.static_folder, folder)
+        for name in sorted(os.listdir(base)):
+            source = self._source(f'{folder}/{name}')
+            if source is None:
+                continue
+            path, digest, original_width = source
+            for width in self._widths_for(original_width):
+                for fmt in FORMATS:
+                    dest = os.path.join(self.cache_dir, f'{digest}-{width}.{fmt}')
+                    if not os.path.exists(dest):
+                        yield path, dest, width, fmt
+
+
+def init_app(app):
+    """Give ``app`` its own ImagePipeline: the /img route, the template helpers and the CLI command"""
+    images = ImagePipeline(
+        app.static_folder,
+        app.config.get('IMAGE_CACHE_DIR') or os.path.join(app.instance_path, 'image_cache'),
+        widths=app.config.get('IMAGE_WIDTHS', (320, 640, 960)),
+        quality=app.config.get('IMAGE_QUALITY', 80),
+    )
+    app.add_url_rule('/img/<int:width>/<any(webp, jpeg):fmt>/<path:filename>',
+                     'image_derivative', images.serve)
+    app.jinja_env.globals.update(image_src=images.src, image_srcset=images.srcset)
+    app.cli.add_command(build_images_command)
+    app.extensions['images'] = images
+    return images
+
+
+@click.command('build-images')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+def build_images_command(workers):
+    """Generate every missing image derivative in a process pool."""
+    images = current_app.extensions['images']
+    jobs = list(images.jobs())
+    if not jobs:
+        click.echo('All image derivatives are up to date.')
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_derivative, *job, images.quality) for job in jobs]
+        for future in futures:
+            future.result()
+    click.echo(f'Built {len(jobs)} image derivative(s) in {images.cache_dir}')
@@ -0,0 +1,85 @@
+"""Read-through cache for the public RSVP pages.
+
+``/rsvp/<token>`` and its confirmation page only show invitation, booking,
+venue and hall details that almost never change, yet each hit used to
+cost four queries. The cache keeps an immutable bundle of those details
+per token. Entries expire after a TTL. An edit of the invitation or its
+booking drops the entry at once in the process that made the edit; other
+workers keep serving their copy until its TTL runs out.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+InvitationView = namedtuple('InvitationView', 'id booking_id title message event_time dress_code additional_info unique_token')
+BookingView = namedtuple('BookingView', 'id event_date event_type')
+VenueView = namedtuple('VenueView', 'id name address description district email phone')
+HallView = namedtuple('HallView', 'id name description')
+InvitationBundle = namedtuple('InvitationBundle', 'invitation booking venue hall')
+
+
+class BundleCache:
+    """Thread-safe LRU cache with a TTL, keyed by invitation token"""
+
+    def __init__(self, loader=None, ttl=300, max_entries=1024):
+        # loader(token) -> InvitationBundle or None
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Bumped by invalidation, so a load that started before an edit isn't cached
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app, loader=None):
+        if loader is not None:
+            self.loader = loader
+        self.ttl = app.config.get('INVITATION_CACHE_TTL', 300)
+        self.max_entries = app.config.get('INVITATION_CACHE_SIZE', 1024)
+        app.extensions['invitation_bundles'] = self
+
+    def get(self, token):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[0]
+            generation = (self._epoch, self._generations.get(token, 0))
+        self.misses += 1
+
+        bundle = self.loader(token)
+        # Unknown tokens are not cached, so random guesses can't fill the cache
+        if bundle is not None and self.ttl:
+            with self._lock:
+                if generation != (self._epoch, self._generations.get(token, 0)):
+                    # Invalidated while loading: the bundle may predate the edit
+                    return bundle
+                self._entries[token] = (bundle, now + self.ttl)
+                self._entries.move_to_end(token)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return bundle
+
+    def invalidate(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+            self._generations[token] = self._generations.get(token, 0) + 1
+
+    def invalidate_booking(self, booking_id):
+        with self._lock:
+            stale = [token for token, (bundle, _) in self._entries.items() if bundle.booking.id == booking_id]
+            for token in stale:
+                del self._entries[token]
+            # A token being loaded right now isn't known to belong to the booking yet
+            self._epoch += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
@@ -0,0 +1,273 @@
+"""Background job queue for side effects that should not block a request.
+
+Jobs are rows in a small SQLite file, so anything enqueued survives a
+restart. A fixed pool of worker threads claims jobs, runs the registered
+handler inside an app context and retries failures with exponential
+backoff.
+
+Usage::
+
+    @job_queue.task('build_feedback_workbook')
+    def build_feedback_workbook_job():
+        ensure_feedback_workbook()
+
+    db.session.commit()
+    job_queue.enqueue_unique('build_feedback_workbook', delay=30)
+
+Handlers are registered once, on the module-level ``job_queue``. Each app
+gets its own JobRunner (queue file, worker threads, stats) from
+``job_queue.init_app(app)``; the calls above go to the current app's.
+"""
+import collections
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+log = logging.getLogger('toy_planner.jobs')
+
+
+class JobQueue:
+    """Registry of job handlers; forwards queue operations to the current app's JobRunner"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def init_app(self, app):
+        """Open the app's queue file and start its worker threads; returns the JobRunner"""
+        runner = JobRunner(app, self.handlers)
+        app.extensions['job_queue'] = runner
+        return runner
+
+    def task(self, name):
+        """Register a handler under ``name``"""
+        def decorator(func):
+            self.handlers[name] = func
+            return func
+        return decorator
+
+    def runner(self):
+        return current_app.extensions['job_queue']
+
+    def enqueue(self, name, *args, **kwargs):
+        return self.runner().enqueue(name, *args, **kwargs)
+
+    def enqueue_unique(self, name, delay=0):
+        return self.runner().enqueue_unique(name, delay=delay)
+
+    def stats(self):
+        return self.runner().stats()
+
+
+class JobRunner:
+    """SQLite-backed job queue of one app, with a bounded pool of worker threads"""
+
+    def __init__(self, app, handlers):
+        self.app = app
+        self.handlers = handlers
+        self.lease = 300
+        self.poll_interval = 1.0
+        self.keep_done = 24 * 3600
+        self._last_prune = 0.0
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._workers = []
+        # (queued-to-finished seconds, run seconds) for recently finished jobs
+        self._latencies = collections.deque(maxlen=500)
+        self.path = app.config.get('JOB_QUEUE_PATH') or os.path.join(app.instance_path, 'jobs.db')
+        self.max_attempts = app.config.get('JOB_QUEUE_MAX_ATTEMPTS', 5)
+        self.backoff = app.config.get('JOB_QUEUE_BACKOFF', 2.0)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS job ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' name TEXT NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' status TEXT NOT NULL DEFAULT \'queued\','  # queued, running, done, failed
+                ' attempts INTEGER NOT NULL DEFAULT 0,'
+                ' last_error TEXT,'
+                ' enqueued_at REAL NOT NULL,'
+                ' run_at REAL NOT NULL,'
+                ' lease_until REAL,'
+                ' finished_at REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_job_status_run_at ON job (status, run_at)')
+
+        workers = app.config.get('JOB_QUEUE_WORKERS', 2)
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._workers.append(thread)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, name, *args, **kwargs):
+        """Persist a job and wake a worker. Call this after the request's commit."""
+        if name not in self.handlers:
+            raise KeyError(f"No job handler registered for '{name}'")
+        now = time.time()
+        payload = json.dumps({'args': args, 'kwargs': kwargs})
+        cursor = self._connect().execute(
+            'INSERT INTO job (name, payload, enqueued_at, run_at) VALUES (?, ?, ?, ?)',
+            (name, payload, now, now)
+        )
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def every(self, name, seconds):
+        """Enqueue job ``name`` every ``seconds`` from a timer thread.
+
+        A new run is skipped while one is still queued or running, so
+        several processes scheduling the same job don't pile up copies.
+        """
+        def run():
+            while True:
+                time.sleep(seconds)
+                try:
+                    self.enqueue_unique(name)
+                except sqlite3.Error as e:
+                    log.error('Could not schedule job %s: %s', name, e)
+
+        thread = threading.Thread(target=run, name=f'job-schedule-{name}', daemon=True)
+        thread.start()
+        return thread
+
+    def enqueue_unique(self, name, delay=0):
+        """Enqueue argument-less job ``name`` unless a run is already queued or running.
+
+        With ``delay`` this debounces: a burst of calls within ``delay``
+        seconds produces a single run at the end of the first one's delay.
+        """
+        if name not in self.handlers:
+            raise KeyError(f"No job handler registered for '{name}'")
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            pending = conn.execute(
+                'SELECT 1 FROM job WHERE name = ? AND status IN (\'queued\', \'running\') LIMIT 1', (name,)
+            ).fetchone()
+            if not pending:
+                conn.execute(
+                    'INSERT INTO job (name, payload, enqueued_at, run_at) VALUES (?, ?, ?, ?)',
+                    (name, json.dumps({'args': [], 'kwargs': {}}), now, now + delay)
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._wakeup.set()
+
+    def _claim(self):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Jobs whose lease ran out belonged to a worker that died mid-run
+            row = conn.execute(
+                'SELECT id, name, payload, attempts, enqueued_at FROM job'
+                ' WHERE (status = \'queued\' AND run_at <= ?)'
+                ' OR (status = \'running\' AND lease_until < ?)'
+                ' ORDER BY run_at LIMIT 1',
+                (now, now)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    'UPDATE job SET status = \'running\', attempts = attempts + 1, lease_until = ? WHERE id = ?',
+                    (now + self.lease, row[0])
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                log.error('Job queue claim failed: %s', e)
+                job = None
+            if job is None:
+                self._prune()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run(*job)
+
+    def _prune(self):
+        # Finished jobs are only kept around for a day for inspection
+        now = time.time()
+        if now - self._last_prune < 600:
+            return
+        self._last_prune = now
+        self._connect().execute(
+            'DELETE FROM job WHERE status = \'done\' AND finished_at < ?', (now - self.keep_done,)
+        )
+
+    def _run(self, job_id, name, payload, attempts, enqueued_at):
+        conn = self._connect()
+        started = time.time()
+        try:
+            handler = self.handlers[name]
+            data = json.loads(payload)
+            with self.app.app_context():
+                handler(*data['args'], **data['kwargs'])
+        except Exception as e:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                conn.execute(
+                    'UPDATE job SET status = \'failed\', last_error = ?, finished_at = ? WHERE id = ?',
+                    (repr(e), time.time(), job_id)
+                )
+                log.error('Job %s (%s) failed permanently: %s', job_id, name, e)
+            else:
+                conn.execute(
+                    'UPDATE job SET status = \'queued\', last_error = ?, run_at = ? WHERE id = ?',
+                    (repr(e), time.time() + self.backoff ** attempts, job_id)
+                )
+            return
+
+        finished = time.time()
+        conn.execute('UPDATE job SET status = \'done\', finished_at = ? WHERE id = ?', (finished, job_id))
+        self._latencies.append((finished - enqueued_at, finished - started))
+
+    def stats(self):
+        """Queue depth per status plus latency of recently finished jobs"""
+        rows = self._connect().execute('SELECT status, COUNT(*) FROM job GROUP BY status').fetchall()
+        counts = {status: count for status, count in rows}
+        latencies = list(self._latencies)
+
+        def summary(values):
+            if not values:
+                return {'avg_ms': None, 'p95_ms': None}
+            values = sorted(values)
+            return {
+                'avg_ms': round(sum(values) / len(values) * 1000, 1),
+                'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+            }
+
+        return {
+            'depth': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'failed': counts.get('failed', 0),
+            'done': counts.get('done', 0),
+            'workers': len(self._workers),
+            'latency': summary([total for total, _ in latencies]),
+            'run_time': summary([run for _, run in latencies]),
+        }
+
+
+job_queue = JobQueue()
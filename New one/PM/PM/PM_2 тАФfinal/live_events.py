@@ -0,0 +1,176 @@
+"""In-process pub/sub behind the live RSVP dashboard.
+
+The RSVP write path publishes small deltas (a new guest row, the updated
+counters) to a channel per invitation, and each open dashboard holds a
+Server-Sent Events stream that waits on that channel. A waiting stream
+blocks on a condition variable, so idle dashboards cost one sleeping
+thread and a heartbeat comment every LIVE_EVENTS_HEARTBEAT seconds, and
+no database work at all.
+
+Every channel keeps its last LIVE_EVENTS_HISTORY events, so a browser
+that reconnects with ``Last-Event-ID`` gets exactly what it missed. When
+the id is too old, or comes from another process or an earlier run, the
+stream sends a ``reset`` event and the page reloads itself instead.
+
+A stream ends after LIVE_EVENTS_MAX_STREAM seconds; the browser
+reconnects on its own with ``Last-Event-ID``, so nothing is lost, and a
+worker thread is never held by one tab for longer than that.
+
+Each open stream occupies a worker thread (or greenlet) while it waits.
+Run the app under a threaded or async worker class, e.g. Gunicorn's
+``--worker-class gthread --threads 32`` or ``gevent``; with the default
+sync workers every open dashboard takes a whole worker.
+
+Events only reach dashboards connected to the process that handled the
+RSVP; with several workers the page still catches up on its next reload.
+"""
+import collections
+import json
+import secrets
+import threading
+import time
+
+Event = collections.namedtuple('Event', 'seq type data')
+
+
+class _Channel:
+    def __init__(self, history):
+        self.cond = threading.Condition()
+        self.events = collections.deque(maxlen=history)
+        self.seq = 0
+        self.listeners = 0
+        self.touched = time.monotonic()
+
+
+class EventBroker:
+    """Per-key event channels with a bounded replay history"""
+
+    def __init__(self, history=200, heartbeat=15, idle_ttl=600, max_stream=300):
+        self.history = history
+        self.heartbeat = heartbeat
+        self.max_stream = max_stream
+        # Channels nobody has watched for this long are dropped
+        self.idle_ttl = idle_ttl
+        # Event ids are '<epoch>-<seq>', so ids from a previous run are never mistaken for ours
+        self.epoch = secrets.token_hex(4)
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.history = app.config.get('LIVE_EVENTS_HISTORY', 200)
+        self.heartbeat = app.config.get('LIVE_EVENTS_HEARTBEAT', 15)
+        self.max_stream = app.config.get('LIVE_EVENTS_MAX_STREAM', 300)
+        app.extensions['live_events'] = self
+
+    def _channel(self, key):
+        with self._lock:
+            channel = self._channels.get(key)
+            if channel is None:
+                self._prune()
+                channel = self._channels[key] = _Channel(self.history)
+            channel.touched = time.monotonic()
+            return channel
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        for key in [key for key, channel in self._channels.items()
+                    if not channel.listeners and channel.touched < cutoff]:
+            del self._channels[key]
+
+    def is_open(self, key):
+        with self._lock:
+            return key in self._channels
+
+    def publish(self, key, event_type, data):
+        """Append an event to ``key`` and wake its listeners.
+
+        Keys no dashboard has opened are skipped, so RSVPs for invitations
+        nobody is watching cost nothing.
+        """
+        with self._lock:
+            channel = self._channels.get(key)
+        if channel is None:
+            return
+        with channel.cond:
+            channel.seq += 1
+            channel.events.append(Event(channel.seq, event_type, data))
+            channel.cond.notify_all()
+
+    def last_event_id(self, key):
+        """Id of the newest event on ``key``; pages pass it back to resume from there"""
+        channel = self._channel(key)
+        with channel.cond:
+            return f"{self.epoch}-{channel.seq}"
+
+    def _position(self, channel, last_event_id, strict):
+        # Sequence number to resume after, or None when the history can't cover the gap
+        if not last_event_id:
+            return channel.seq
+        epoch, _, seq = last_event_id.partition('-')
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > channel.seq:
+            # An id from another process: only a reconnect is known to have missed something
+            return None if strict else channel.seq
+        oldest = channel.events[0].seq if channel.events else channel.seq + 1
+        if int(seq) < oldest - 1:
+            return None
+        return int(seq)
+
+    def listen(self, key, last_event_id=None, strict=True):
+        """Yield SSE-formatted text for ``key`` until the client goes away or max_stream passes.
+
+        ``strict=False`` is for the id a page was rendered with: if another
+        worker rendered it, the stream starts from now instead of resetting.
+        """
+        channel = self._channel(key)
+        deadline = time.monotonic() + self.max_stream
+        with channel.cond:
+            channel.listeners += 1
+            position = self._position(channel, last_event_id, strict)
+        try:
+            yield "retry: 3000\n\n"
+            if position is None:
+                yield self.format(None, 'reset', {})
+                return
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # The browser reconnects after `retry` with the last id it got
+                    return
+                with channel.cond:
+                    if channel.seq <= position:
+                        channel.cond.wait(min(self.heartbeat, remaining))
+                    if channel.events and channel.events[0].seq > position + 1:
+                        # Fell behind by more than the history holds
+                        pending = None
+                    else:
+                        pending = [event for event in channel.events if event.seq > position]
+                if pending is None:
+                    yield self.format(None, 'reset', {})
+                    return
+                if not pending:
+                    # Heartbeat: keeps proxies from closing the idle connection
+                    yield ": ping\n\n"
+                    continue
+                for event in pending:
+                    yield self.format(event.seq, event.type, event.data)
+                position = pending[-1].seq
+        finally:
+            with channel.cond:
+                channel.listeners -= 1
+                channel.touched = time.monotonic()
+
+    def format(self, seq, event_type, data):
+        lines = []
+        if seq is not None:
+            lines.append(f"id: {self.epoch}-{seq}")
+        lines.append(f"event: {event_type}")
+        lines.append(f"data: {json.dumps(data)}")
+        return '\n'.join(lines) + '\n\n'
+
+    def stats(self):
+        with self._lock:
+            channels = list(self._channels.values())
+        return {
+            'channels': len(channels),
+            'listeners': sum(channel.listeners for channel in channels),
+        }
@@ -0,0 +1,139 @@
+"""Structured logging for the app.
+
+Request threads only put log records on a queue; a listener thread does
+the formatting and writes to stderr, so slow terminals or log pipes never
+hold up a response. Every record logged during a request carries that
+request's correlation id (taken from an incoming X-Request-ID header or
+generated), and the id is echoed back in the response headers.
+
+Settings::
+
+    LOG_LEVEL        level for the 'toy_planner' loggers (default INFO)
+    LOG_LEVELS       per-logger overrides, e.g. {'toy_planner.jobs': 'WARNING'}
+    LOG_FORMAT       'json' (one object per line) or 'text'
+    LOG_SAMPLE_RATES fraction of records to keep per event name, e.g.
+                     {'rsvp.submitted': 0.1}; warnings and errors are never dropped
+
+The 'toy_planner' loggers belong to the process, so when several apps are
+built the last one's settings apply and its listener replaces the
+previous one.
+
+Log with an event name and fields in ``extra``::
+
+    log.info('RSVP submitted', extra={'event': 'rsvp.submitted', 'guest_id': guest_id})
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import secrets
+import sys
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request's correlation id, method and path"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = getattr(g, 'request_id', '-')
+            record.method = request.method
+            record.path = request.path
+        else:
+            record.request_id = '-'
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of the records for high-volume events"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, 'event', None))
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        return random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Leave formatting to the listener thread; only resolve what can't cross threads
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def init_app(app):
+    """Route the 'toy_planner' loggers through a queue and tag records with request ids"""
+    global _listener
+    if app.config.get('LOG_FORMAT', 'json') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s')
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter(app.config.get('LOG_SAMPLE_RATES', {})))
+    listener = logging.handlers.QueueListener(records, stream, respect_handler_level=True)
+    if _listener is not None:
+        # Flushes what the previous app's handler queued, then ends its thread
+        _listener.stop()
+        atexit.unregister(_listener.stop)
+    listener.start()
+    atexit.register(listener.stop)
+    _listener = listener
+
+    root = logging.getLogger('toy_planner')
+    root.handlers[:] = [handler]
+    root.propagate = False
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    for name, level in app.config.get('LOG_LEVELS', {}).items():
+        logging.getLogger(name).setLevel(level)
+
+    @app.before_request
+    def assign_request_id():
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming[:64] if incoming.isprintable() and incoming else secrets.token_hex(8)
+
+    @app.after_request
+    def echo_request_id(response):
+        request_id = getattr(g, 'request_id', None)
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
+
+    return listener
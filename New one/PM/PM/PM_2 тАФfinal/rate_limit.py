@@ -0,0 +1,186 @@
+"""Token-bucket rate limiting for the public write endpoints.
+
+Each limited route gets a bucket per (client IP, invitation token) that
+holds up to N requests and refills at N per period, so a guest can fire a
+short burst but a script can't keep hammering the SQLite write lock.
+Limits are set per route name in RATE_LIMITS, e.g.::
+
+    app.config['RATE_LIMITS'] = {'rsvp': '10/minute', 'feedback': '5/minute'}
+
+Two bucket backends are available:
+
+* ``memory`` - a dict guarded by a lock, a few microseconds per check.
+  Each worker process enforces the limit on its own.
+* ``sqlite`` - a small SQLite file shared by all workers on the host.
+
+Behind a reverse proxy, wrap the app in werkzeug's ProxyFix so
+``request.remote_addr`` is the client and not the proxy.
+"""
+import collections
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, jsonify, request
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(value):
+    """'20/minute' -> (capacity 20, refill rate in tokens per second)"""
+    count, _, period = value.partition('/')
+    count = int(count)
+    seconds = _PERIODS[period.strip().rstrip('s')]
+    return count, count / seconds
+
+
+class MemoryBucketStore:
+    """In-process buckets; idle ones are dropped once they would be full again"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        """Take one token; returns 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            # Third field: when the bucket is full again and the entry can be forgotten
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+
+
+class SqliteBucketStore:
+    """Buckets in a SQLite file, shared by all workers on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._last_prune = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS bucket ('
+                ' key TEXT PRIMARY KEY,'
+                ' tokens REAL NOT NULL,'
+                ' updated REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            conn.execute('INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)',
+                         (key, tokens - 1 if not wait else tokens, now))
+            if now - self._last_prune > 600:
+                # Buckets untouched for a day are full again, so forgetting them changes nothing
+                self._last_prune = now
+                conn.execute('DELETE FROM bucket WHERE updated < ?', (now - 86400,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class RateLimits:
+    """One app's limits, bucket store and allowed/rejected counts"""
+
+    def __init__(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.limits = {name: parse_limit(value) for name, value in app.config.get('RATE_LIMITS', {}).items()}
+        self.allowed = collections.Counter()
+        self.rejected = collections.Counter()
+        backend = app.config.get('RATE_LIMIT_STORE', 'memory')
+        if backend == 'sqlite':
+            path = app.config.get('RATE_LIMIT_SQLITE_PATH') or os.path.join(app.instance_path, 'ratelimit.db')
+            self.store = SqliteBucketStore(path)
+        elif backend == 'memory':
+            self.store = MemoryBucketStore()
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_STORE '{backend}'")
+
+    def stats(self):
+        return {
+            name: {'limit': f'{capacity} per {capacity / rate:g}s',
+                   'allowed': self.allowed[name], 'rejected': self.rejected[name]}
+            for name, (capacity, rate) in self.limits.items()
+        }
+
+
+class RateLimiter:
+    """Per-route token buckets keyed by client IP and invitation token.
+
+    Views are decorated once at import; the buckets belong to each app
+    (``app.extensions['rate_limiter']``, set up by ``init_app``).
+    """
+
+    def init_app(self, app):
+        limits = RateLimits(app)
+        app.extensions['rate_limiter'] = limits
+        return limits
+
+    def limit(self, name, methods=('POST',)):
+        """Apply the RATE_LIMITS[name] bucket to a view for the given methods"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                state = current_app.extensions['rate_limiter']
+                limit = state.limits.get(name)
+                if not state.enabled or limit is None or request.method not in methods:
+                    return view(*args, **kwargs)
+                key = f"{name}:{request.remote_addr}:{kwargs.get('token', '')}"
+                wait = state.store.take(key, *limit)
+                if not wait:
+                    state.allowed[name] += 1
+                    return view(*args, **kwargs)
+                state.rejected[name] += 1
+                return self._too_many_requests(wait)
+            return wrapper
+        return decorator
+
+    def _too_many_requests(self, wait):
+        retry_after = str(max(1, int(wait + 0.999)))
+        message = 'Too many requests, please try again in a moment.'
+        if request.is_json or request.accept_mimetypes.best == 'application/json':
+            response = jsonify({'success': False, 'error': message})
+            response.status_code = 429
+        else:
+            response = Response(message, status=429, mimetype='text/plain')
+        response.headers['Retry-After'] = retry_after
+        return response
+
+    def stats(self):
+        return current_app.extensions['rate_limiter'].stats()
+
+
+rate_limiter = RateLimiter()
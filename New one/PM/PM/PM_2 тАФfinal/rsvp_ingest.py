@@ -0,0 +1,124 @@
+"""Group commit for bursts of RSVP submissions.
+
+When an invitation link is shared in a big group chat, hundreds of
+guests answer within minutes and SQLite serialises every commit. Request
+threads hand validated submissions to a single writer thread, which
+writes them in small batches with one commit per batch. A batch is
+flushed when it reaches RSVP_BATCH_SIZE items or RSVP_BATCH_WAIT
+seconds after its first item arrived, whichever comes first.
+
+``submit()`` returns a Future that resolves once the row is committed,
+so a guest is only told "thank you" after their answer is durable. Wait
+on it with ``result()``: a submission that times out before the writer
+picks it up is withdrawn, so a guest who is asked to try again never has
+their first answer committed as well.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+
+class GroupCommitter:
+    """Collects submissions and writes them in batches on one thread"""
+
+    def __init__(self, writer=None):
+        # writer(items) -> list of results, one per item, all in one transaction
+        self.writer = writer
+        self.app = None
+        self.batch_size = 50
+        self.max_wait = 0.05
+        self.enabled = False
+        self._queue = queue.Queue()
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+        self.withdrawn = 0
+
+    def init_app(self, app, writer=None):
+        self.app = app
+        if writer is not None:
+            self.writer = writer
+        self.batch_size = app.config.get('RSVP_BATCH_SIZE', 50)
+        self.max_wait = app.config.get('RSVP_BATCH_WAIT', 0.05)
+        self.enabled = app.config.get('RSVP_GROUP_COMMIT', True)
+        app.extensions['rsvp_committer'] = self
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, name='rsvp-group-commit', daemon=True)
+            self._thread.start()
+
+    def submit(self, item):
+        """Queue one validated submission and return a Future for its result"""
+        future = Future()
+        if not self.enabled:
+            # Inline path: a batch of one on the request thread
+            try:
+                future.set_result(self.writer([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._queue.put((item, future))
+        return future
+
+    def result(self, future, timeout=None):
+        """Wait for a submitted item; on timeout withdraw it if it hasn't been picked up yet.
+
+        Raises concurrent.futures.TimeoutError (the builtin TimeoutError from
+        Python 3.11 on) only when the item was withdrawn and will never be
+        written.
+        """
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                self.withdrawn += 1
+                raise
+            # Its batch is already being written; that ends in one commit either way
+            return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Drop items whose request gave up waiting; the rest can no longer be cancelled
+            batch = [entry for entry in self._collect() if entry[1].set_running_or_notify_cancel()]
+            if batch:
+                with self.app.app_context():
+                    self._write(batch)
+
+    def _write(self, batch):
+        try:
+            results = self.writer([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # One bad submission must not fail its neighbours: retry them one by one
+            for entry in batch:
+                self._write([entry])
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'batches': self.batches,
+            'items': self.items,
+            'withdrawn': self.withdrawn,
+            'avg_batch': round(self.items / self.batches, 2) if self.batches else None,
+        }
@@ -0,0 +1,71 @@
+"""Load test for the public RSVP endpoint.
+
+Fires concurrent RSVP submissions at a running server and reports the
+sustained RSVPs per second. Compare the write paths by starting the app
+once with RSVP_GROUP_COMMIT=0 (one commit per RSVP) and once with the
+default group commit:
+
+    RATE_LIMIT_ENABLED=0 RSVP_GROUP_COMMIT=0 python app.py
+    python scripts/bench_rsvp.py http://localhost:5000 <invitation-token>
+
+All requests come from one IP, so the RSVP rate limit has to be off.
+
+The invitation token is the last part of the /rsvp/<token> share link.
+"""
+import argparse
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def submit(url, n):
+    body = urllib.parse.urlencode({
+        'name': f'Load Test Guest {n}',
+        'phone': f'+7 700 000 {n:04d}',
+        'rsvp_status': 'attending' if n % 4 else 'not_attending',
+        'plus_one': n % 3,
+        'dietary_restrictions': 'Halal' if n % 5 == 0 else '',
+    }).encode()
+    opener = urllib.request.build_opener(_NoRedirect)
+    started = time.perf_counter()
+    try:
+        status = opener.open(url, data=body, timeout=30).status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    # A redirect to the confirmation page means the RSVP was committed
+    return status == 302, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base_url')
+    parser.add_argument('token')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    url = f"{args.base_url.rstrip('/')}/rsvp/{args.token}"
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda n: submit(url, n), range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    ok = [latency for success, latency in results if success]
+    latencies = sorted(latency for _, latency in results)
+    print(f"{len(ok)}/{args.requests} RSVPs committed in {elapsed:.2f}s "
+          f"with {args.concurrency} concurrent clients")
+    print(f"throughput: {len(ok) / elapsed:.1f} RSVPs/s")
+    print(f"latency: median {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Multi-threaded read/write benchmark for the SQLite connection settings.
+
+Runs reader and writer threads against a scratch database for a fixed
+time, once with a plain engine (rollback journal, driver defaults) and
+once with the pragmas from sqlite_setup (WAL, busy_timeout, ...), and
+once more with the readers on their own pool of ``mode=ro`` connections
+as db_routing sets up for read-only views. It reports operations per
+second, p95 latency and errors for each:
+
+    python scripts/bench_sqlite.py
+    python scripts/bench_sqlite.py --readers 16 --writers 4 --seconds 10
+    python scripts/bench_sqlite.py --processes 4   # like 4 app workers
+
+Readers run the kind of query the invitation dashboard does (counts over
+an invitation's guests plus one page of rows); writers insert a guest and
+bump the invitation's counter in one transaction, like an RSVP.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+from sqlalchemy import URL, create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sqlite_setup  # noqa: E402
+
+INVITATIONS = 50
+
+SCHEMA = [
+    'CREATE TABLE invitation (id INTEGER PRIMARY KEY, attending_count INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE guest (id INTEGER PRIMARY KEY, invitation_id INTEGER NOT NULL, name TEXT,'
+    ' rsvp_status TEXT, created_at REAL)',
+    'CREATE INDEX ix_guest_invitation_id ON guest (invitation_id, created_at)',
+]
+
+
+def setup(path, rows):
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text('INSERT INTO invitation (id) VALUES (:id)'), [{'id': i} for i in range(1, INVITATIONS + 1)])
+        conn.execute(text('INSERT INTO guest (invitation_id, name, rsvp_status, created_at) VALUES (:i, :n, :s, :t)'),
+                     [{'i': n % INVITATIONS + 1, 'n': f'Guest {n}', 's': 'attending', 't': time.time()}
+                      for n in range(rows)])
+    engine.dispose()
+
+
+def reader(engine, stop, results):
+    while not stop.is_set():
+        invitation_id = random.randint(1, INVITATIONS)
+        started = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text('SELECT rsvp_status, COUNT(*) FROM guest WHERE invitation_id = :i'
+                                  ' GROUP BY rsvp_status'), {'i': invitation_id}).all()
+                conn.execute(text('SELECT * FROM guest WHERE invitation_id = :i ORDER BY created_at DESC'
+                                  ' LIMIT 50'), {'i': invitation_id}).all()
+            results.append(('read', time.perf_counter() - started, None))
+        except Exception as e:
+            results.append(('read', time.perf_counter() - started, type(e).__name__))
+
+
+def writer(engine, stop, results):
+    while not stop.is_set():
+        invitation_id = random.randint(1, INVITATIONS)
+        started = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                conn.execute(text('INSERT INTO guest (invitation_id, name, rsvp_status, created_at)'
+                                  ' VALUES (:i, :n, :s, :t)'),
+                             {'i': invitation_id, 'n': 'Bench Guest', 's': 'attending', 't': time.time()})
+                conn.execute(text('UPDATE invitation SET attending_count = attending_count + 1 WHERE id = :i'),
+                             {'i': invitation_id})
+            results.append(('write', time.perf_counter() - started, None))
+        except Exception as e:
+            results.append(('write', time.perf_counter() - started, type(e).__name__))
+
+
+def load(path, tuned, read_only, readers, writers, seconds):
+    """One process's share of the load; returns [(kind, seconds, error or None)]"""
+    engine = create_engine(f'sqlite:///{path}', pool_size=readers + writers, max_overflow=0)
+    if tuned:
+        sqlite_setup.apply_pragmas(engine)
+    read_engine = engine
+    if read_only:
+        url = URL.create('sqlite', database=f'file:{quote(path)}', query={'mode': 'ro', 'uri': 'true'})
+        read_engine = create_engine(url, pool_size=readers, max_overflow=0)
+        sqlite_setup.apply_pragmas(read_engine, {'journal_mode': None})
+
+    stop = threading.Event()
+    results = []
+    threads = [threading.Thread(target=reader, args=(read_engine, stop, results)) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(engine, stop, results)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    read_engine.dispose()
+    return results
+
+
+def run(label, tuned, args, read_only=False):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        setup(path, args.rows)
+        if tuned:
+            # Switch the file to WAL before several processes open it at once
+            engine = create_engine(f'sqlite:///{path}')
+            sqlite_setup.apply_pragmas(engine)
+            engine.connect().close()
+            engine.dispose()
+        share = (path, tuned, read_only, args.readers, args.writers, args.seconds)
+        if args.processes == 1:
+            results = load(*share)
+        else:
+            # Like several app workers: threads share one process's GIL, processes don't
+            with ProcessPoolExecutor(max_workers=args.processes) as pool:
+                futures = [pool.submit(load, *share) for _ in range(args.processes)]
+                results = [result for future in futures for result in future.result()]
+
+    print(label)
+    for kind in ('read', 'write'):
+        ok = sorted(elapsed for k, elapsed, error in results if k == kind and error is None)
+        errors = [error for k, _, error in results if k == kind and error is not None]
+        p95 = ok[int(len(ok) * 0.95)] * 1000 if ok else float('nan')
+        median = statistics.median(ok) * 1000 if ok else float('nan')
+        print(f"  {kind:5}  {len(ok) / args.seconds:8.0f}/s   median {median:7.2f} ms   p95 {p95:7.2f} ms"
+              f"   errors {len(errors)}{' (' + ', '.join(sorted(set(errors))) + ')' if errors else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--processes', type=int, default=1, help='run the readers and writers in this many processes each')
+    parser.add_argument('--rows', type=int, default=50000, help='guest rows in the scratch database')
+    args = parser.parse_args()
+
+    print(f"{args.processes} x ({args.readers} readers, {args.writers} writers), {args.seconds:g}s each, {args.rows} seed rows")
+    run('rollback journal, driver defaults:', False, args)
+    run('sqlite_setup pragmas (WAL, busy_timeout, ...):', True, args)
+    run('pragmas + read-only pool for the readers:', True, args, read_only=True)
+
+
+if __name__ == '__main__':
+    main()
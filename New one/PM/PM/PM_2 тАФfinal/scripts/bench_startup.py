@@ -0,0 +1,89 @@
+"""Startup benchmark: how long importing app.py and building the app take.
+
+Each run is a fresh interpreter. The import is measured with
+``python -X importtime``, which also gives the slowest imports; the boot
+time is create_app() on top of that (extensions, job workers, template
+warmup). Run it from anywhere and keep the numbers per release:
+
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10 --top 25
+    TEMPLATE_WARMUP=0 python scripts/bench_startup.py
+
+Modules listed under "heavy modules loaded" should only appear once the
+code that needs them runs (openpyxl for exports, PIL for images).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('openpyxl', 'PIL', 'alembic')
+
+BOOT_SCRIPT = f'''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+booted = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'boot_ms': (booted - imported) * 1000,
+    'heavy': [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+'''
+
+
+def run(args):
+    result = subprocess.run([sys.executable, *args], cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+    return result.stdout, result.stderr
+
+
+def parse_importtime(stderr, module='app'):
+    """-X importtime output -> (cumulative us of ``module``, {direct import: (self us, cumulative us)})"""
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            children[name.strip()] = (int(self_us), int(cumulative_us))
+        elif depth == 0:
+            # A module's imports are printed before it, so the children seen so far are its own
+            if name.strip() == module:
+                return int(cumulative_us), children
+            children = {}
+    raise RuntimeError(f'{module} not found in -X importtime output')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='how many of the slowest imports to list')
+    args = parser.parse_args()
+
+    import_totals = []
+    modules = {}
+    for _ in range(args.runs):
+        _, stderr = run(['-X', 'importtime', '-c', 'import app'])
+        total_us, modules = parse_importtime(stderr)
+        import_totals.append(total_us / 1000)
+
+    boots = [json.loads(run(['-c', BOOT_SCRIPT])[0].splitlines()[-1]) for _ in range(args.runs)]
+
+    print(f"import app (-X importtime): median {statistics.median(import_totals):7.1f} ms over {args.runs} runs")
+    print(f"import app (wall clock):    median {statistics.median(b['import_ms'] for b in boots):7.1f} ms")
+    print(f"create_app():               median {statistics.median(b['boot_ms'] for b in boots):7.1f} ms")
+    print(f"heavy modules loaded:       {', '.join(boots[-1]['heavy']) or 'none'}")
+    print()
+    print("Slowest imports made by app.py (last run, cumulative):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}  (self {self_us / 1000:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
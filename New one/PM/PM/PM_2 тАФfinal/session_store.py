@@ -0,0 +1,251 @@
+"""Server-side session storage.
+
+The browser only keeps an opaque session id in its cookie; the session
+contents (booking drafts, flashes, CSRF token, login info) live in a store
+on the server. Two stores are available:
+
+* ``sqlite`` (default) - a small SQLite file shared by all workers on the
+  host.
+* ``memory`` - a dict with TTL, fine for a single process only: with
+  several Gunicorn workers each one has its own dict and a session made in
+  one is unknown to the others. It holds at most SESSION_MEMORY_MAX_ENTRIES
+  sessions; the least recently saved are evicted first.
+
+Anonymous sessions (a CSRF token, a booking draft) expire after
+SESSION_TTL seconds; only sessions of logged-in users are kept for
+PERMANENT_SESSION_LIFETIME.
+"""
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+_serializer = TaggedJSONSerializer()
+log = logging.getLogger('toy_planner.sessions')
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its id and whether it was changed"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        # Stored id to delete on save, after regenerate()
+        self.replaced_sid = None
+
+    def regenerate(self):
+        """Move the data to a fresh id, so an id someone else knows stops working.
+
+        Call it whenever the session's privileges change (login, logout).
+        """
+        if not self.new and self.replaced_sid is None:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class MemorySessionStore:
+    """In-process session store with per-entry expiry and a size bound"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._data.get(sid)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at < time.time():
+            self.delete(sid)
+            return None
+        return _serializer.loads(payload)
+
+    def set(self, sid, data, ttl):
+        payload = _serializer.dumps(data)
+        with self._lock:
+            self._data[sid] = (payload, time.time() + ttl)
+            self._data.move_to_end(sid)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def sweep(self):
+        """Drop expired sessions, returns how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (_, expires_at) in self._data.items() if expires_at < now]
+            for sid in expired:
+                del self._data[sid]
+        return len(expired)
+
+
+class SqliteSessionStore:
+    """Session store backed by a SQLite file, safe to share between workers"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS session ('
+                ' sid TEXT PRIMARY KEY,'
+                ' data TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_session_expires_at ON session (expires_at)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid):
+        row = self._connect().execute(
+            'SELECT data FROM session WHERE sid = ? AND expires_at >= ?', (sid, time.time())
+        ).fetchone()
+        return _serializer.loads(row[0]) if row else None
+
+    def set(self, sid, data, ttl):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO session (sid, data, expires_at) VALUES (?, ?, ?)',
+                (sid, _serializer.dumps(data), time.time() + ttl)
+            )
+
+    def delete(self, sid):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM session WHERE sid = ?', (sid,))
+
+    def sweep(self):
+        """Drop expired sessions, returns how many were removed"""
+        with self._connect() as conn:
+            return conn.execute('DELETE FROM session WHERE expires_at < ?', (time.time(),)).rowcount
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps only a random session id in the cookie.
+
+    The id is unguessable, so there is nothing to sign and no per-request
+    HMAC work. Static files, fingerprinted assets and resized images
+    (``skip_paths``) never touch the store.
+    """
+
+    def __init__(self, store, anonymous_ttl=7200, skip_paths=()):
+        self.store = store
+        self.anonymous_ttl = anonymous_ttl
+        self.skip_paths = tuple(skip_paths)
+
+    def _ttl(self, app, session):
+        if session.get('user_id') is not None:
+            return int(app.permanent_session_lifetime.total_seconds())
+        return self.anonymous_ttl
+
+    def _skipped(self, app, request):
+        if app.static_url_path and request.path.startswith(app.static_url_path + '/'):
+            return True
+        return request.path.startswith(self.skip_paths)
+
+    def open_session(self, app, request):
+        if self._skipped(app, request):
+            return ServerSideSession(new=True)
+
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.get(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        # Never adopt an unknown id sent by the client
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.sid is None:
+            return
+        if session.replaced_sid is not None:
+            self.store.delete(session.replaced_sid)
+            session.replaced_sid = None
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified:
+            return
+
+        self.store.set(session.sid, dict(session), self._ttl(app, session))
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add('Cookie')
+
+
+def _start_sweeper(store, interval):
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                store.sweep()
+            except Exception as e:
+                log.error('Session sweep failed: %s', e)
+
+    thread = threading.Thread(target=run, name='session-sweeper', daemon=True)
+    thread.start()
+    return thread
+
+
+def init_app(app):
+    """Install the configured server-side session store on the app"""
+    backend = app.config.get('SESSION_STORE', 'sqlite')
+    if backend == 'sqlite':
+        path = app.config.get('SESSION_SQLITE_PATH') or os.path.join(app.instance_path, 'sessions.db')
+        store = SqliteSessionStore(path)
+    elif backend == 'memory':
+        store = MemorySessionStore(app.config.get('SESSION_MEMORY_MAX_ENTRIES', 10000))
+    else:
+        raise ValueError(f"Unknown SESSION_STORE '{backend}'")
+
+    app.session_interface = ServerSideSessionInterface(
+        store,
+        anonymous_ttl=app.config.get('SESSION_TTL', 7200),
+        skip_paths=app.config.get('SESSION_SKIP_PATHS', ()),
+    )
+    interval = app.config.get('SESSION_SWEEP_INTERVAL', 300)
+    if interval:
+        _start_sweeper(store, interval)
+    return store
@@ -0,0 +1,56 @@
+"""Per-connection SQLite settings for the app's engines.
+
+Out of the box SQLite uses a rollback journal: a writer locks out every
+reader while it commits, and a second writer gets "database is locked".
+Each new connection is configured with the pragmas below:
+
+* ``journal_mode=WAL`` - readers keep reading while one writer commits
+* ``busy_timeout`` - a blocked writer waits this many ms instead of failing
+* ``synchronous=NORMAL`` - fsync at checkpoints, not every commit (safe with WAL)
+* ``cache_size`` / ``mmap_size`` - a bigger page cache and memory-mapped reads
+* ``temp_store=MEMORY`` - sorts and temp indexes stay off the disk
+
+Override any of them with SQLITE_PRAGMAS, e.g.
+``{'busy_timeout': 10000, 'mmap_size': 0}``. The connection pool is
+configured with SQLALCHEMY_ENGINE_OPTIONS as usual.
+"""
+import logging
+
+from sqlalchemy import event
+
+log = logging.getLogger('toy_planner.db')
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,  # ms
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,  # negative: KiB, so ~20 MB per connection
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_pragmas(engine, pragmas=None):
+    """Run the pragmas on every new DBAPI connection of a SQLite ``engine``"""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+    statements = [f'PRAGMA {name}={value}' for name, value in pragmas.items() if value is not None]
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    log.debug('SQLite pragmas for %s: %s', engine.url, '; '.join(statements))
+
+
+def init_app(app, db):
+    """Apply SQLITE_PRAGMAS to every engine ``db`` has for ``app``"""
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_pragmas(engine, app.config.get('SQLITE_PRAGMAS'))
@@ -0,0 +1,69 @@
+"""Jinja bytecode cache and template warmup.
+
+Compiling the large templates (the guest RSVP page, invitation preview,
+user profile) takes tens of milliseconds each, and every worker used to
+pay for it on the first request to each page. Compiled templates are now
+kept as bytecode under TEMPLATE_CACHE_DIR, so only the first worker after
+a template changes compiles it, and with TEMPLATE_WARMUP on every
+template is loaded while the worker boots instead of during a request.
+
+The warmup logs one 'templates.warmup' record with the load time of each
+template. To see the report on demand::
+
+    flask --app app warm-templates
+"""
+import logging
+import os
+import time
+
+import click
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+
+log = logging.getLogger('toy_planner.templates')
+
+
+def init_app(app):
+    cache_dir = app.config.get('TEMPLATE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    app.cli.add_command(warm_templates_command)
+    if app.config.get('TEMPLATE_WARMUP', True):
+        warm_templates(app)
+
+
+def warm_templates(app):
+    """Load every template into the environment's cache; returns [(name, ms)], slowest first"""
+    env = app.jinja_env
+    timings = []
+    started = time.perf_counter()
+    for name in env.list_templates(extensions=('html',)):
+        t0 = time.perf_counter()
+        try:
+            env.get_template(name)
+        except Exception:
+            log.exception('Template failed to compile', extra={'event': 'templates.error', 'template': name})
+            continue
+        timings.append((name, round((time.perf_counter() - t0) * 1000, 2)))
+    timings.sort(key=lambda item: item[1], reverse=True)
+    log.info('Templates warmed', extra={
+        'event': 'templates.warmup',
+        'count': len(timings),
+        'total_ms': round((time.perf_counter() - started) * 1000, 1),
+        'timings_ms': dict(timings),
+    })
+    return timings
+
+
+@click.command('warm-templates')
+@click.option('--clear', is_flag=True, help='Drop the bytecode cache first, to time a cold compile')
+def warm_templates_command(clear):
+    """Load every template and print how long each took."""
+    app = current_app._get_current_object()
+    if clear:
+        app.jinja_env.bytecode_cache.clear()
+    app.jinja_env.cache.clear()
+    timings = warm_templates(app)
+    for name, ms in timings:
+        click.echo(f'{ms:9.2f} ms  {name}')
+    click.echo(f'{sum(ms for _, ms in timings):9.2f} ms  total ({len(timings)} templates)')
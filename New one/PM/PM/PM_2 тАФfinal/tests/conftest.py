@@ -0,0 +1,97 @@
+import itertools
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from app import Booking, Invitation, InvitedGuest, User, Venue, create_app, db  # noqa: E402
+
+_ids = itertools.count(1)
+
+
+def make_app(tmp, **config):
+    """An app keeping all its files under ``tmp``, with background work switched off"""
+    return create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp / 'test.db'}",
+        'JOB_QUEUE_PATH': str(tmp / 'jobs.db'),
+        'SESSION_SQLITE_PATH': str(tmp / 'sessions.db'),
+        'TEMPLATE_CACHE_DIR': str(tmp / 'jinja_cache'),
+        'IMAGE_CACHE_DIR': str(tmp / 'image_cache'),
+        'FEEDBACK_EXPORT_DIR': str(tmp / 'feedback_exports'),
+        'TEMPLATE_WARMUP': False,
+        'RATE_LIMIT_ENABLED': False,
+        'SESSION_SWEEP_INTERVAL': 0,
+        'BOOKING_SWEEP_INTERVAL': 0,
+        'COUNTER_RECONCILE_INTERVAL': 0,
+        **config,
+    })
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """An app on a scratch SQLite file migrated to head"""
+    from flask_migrate import upgrade
+
+    app = make_app(tmp_path_factory.mktemp('app'))
+    with app.app_context():
+        upgrade(directory=os.path.join(PROJECT_DIR, 'migrations'))
+    return app
+
+
+@pytest.fixture
+def app_ctx(app):
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+
+@contextmanager
+def recorded_statements():
+    """Collect the (sql, params) sent by any engine, the read-only pool included"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+
+
+def add_user_with_bookings(bookings, guests_per_invitation=0):
+    """Add a user with ``bookings`` upcoming bookings, each with an invitation and answered guests; returns the user id"""
+    n = next(_ids)
+    user = User(name=f'Host {n}', email=f'host{n}@example.kz', phone=f'+7701{n:07d}')
+    venue = Venue(name=f'Venue {n}', district='Medeu', address='Abay 1', description='Banquet hall',
+                  capacity_min=10, capacity_max=300, price_per_person=15000)
+    db.session.add_all([user, venue])
+    for b in range(bookings):
+        booking = Booking(venue=venue, user=user, client_name=user.name, client_email=user.email,
+                          client_phone=user.phone, event_type='wedding', guest_count=100, total_amount=1500000,
+                          status='confirmed', event_date=date.today() + timedelta(days=30 + b))
+        invitation = Invitation(booking=booking, title='Той', message='Welcome', unique_token=f'inv-{n}-{b}',
+                                invited_count=guests_per_invitation, attending_count=guests_per_invitation,
+                                headcount=guests_per_invitation)
+        invitation.invited_guests = [
+            InvitedGuest(name=f'Guest {g}', phone=f'+7702{g:07d}', rsvp_status='attending',
+                         responded_at=datetime.utcnow())
+            for g in range(guests_per_invitation)
+        ]
+        db.session.add(booking)
+    db.session.commit()
+    return user.id
+
+
+def log_in(client, user_id):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
@@ -0,0 +1,28 @@
+"""Access rules of the operator-only /admin/* routes"""
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def production(app):
+    """The app as deployed: not in testing mode"""
+    app.testing = False
+    yield app
+    app.testing = True
+
+
+def test_admin_routes_are_closed_without_a_token(production, client, monkeypatch):
+    monkeypatch.setitem(production.config, 'ADMIN_TOKEN', None)
+    assert client.get('/admin/bookings/export').status_code == 403
+    assert client.get('/admin/jobs').status_code == 403
+
+
+def test_admin_routes_need_the_configured_token(production, client, monkeypatch):
+    monkeypatch.setitem(production.config, 'ADMIN_TOKEN', 's3cret')
+    assert client.get('/admin/jobs').status_code == 403
+    assert client.get('/admin/jobs', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.get('/admin/jobs', headers={'X-Admin-Token': 's3cret'}).status_code == 200
@@ -0,0 +1,22 @@
+"""create_app() can be called more than once without the apps sharing state"""
+from conftest import make_app
+
+EXTENSIONS = ('compression', 'job_queue', 'rate_limiter', 'rsvp_committer', 'invitation_bundles',
+              'live_events', 'images', 'assets', 'db_routing')
+
+
+def test_apps_keep_their_own_extensions_and_traffic(tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    first = make_app(tmp_path / 'a', COMPRESS_LEVEL=1, RATE_LIMITS={'rsvp': '1/minute'})
+    second = make_app(tmp_path / 'b', COMPRESS_LEVEL=9, RATE_LIMITS={'rsvp': '99/minute'})
+
+    for name in EXTENSIONS:
+        assert first.extensions[name] is not second.extensions[name], name
+    assert first.extensions['job_queue'].path != second.extensions['job_queue'].path
+
+    # Each app's requests reach its own views, settings and counters
+    assert first.test_client().get('/admin/compression').get_json()['level'] == 1
+    assert second.test_client().get('/admin/compression').get_json()['level'] == 9
+    assert first.test_client().get('/admin/rate-limits').get_json()['rsvp']['limit'] == '1 per 60s'
+    assert second.test_client().get('/admin/rate-limits').get_json()['rsvp']['limit'] == '99 per 60s'
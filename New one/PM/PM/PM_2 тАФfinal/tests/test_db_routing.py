@@ -0,0 +1,69 @@
+"""Read-only views query the mode=ro engine and can't write"""
+import pytest
+import sqlalchemy as sa
+
+from app import Feedback, Invitation, db, session_router
+from conftest import add_user_with_bookings
+from db_routing import ReadOnlyViolation
+
+
+@pytest.fixture
+def engines_used():
+    """Engines that ran statements while the test body ran"""
+    used = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        used.append(conn.engine)
+
+    sa.event.listen(sa.engine.Engine, 'before_cursor_execute', record)
+    yield used
+    sa.event.remove(sa.engine.Engine, 'before_cursor_execute', record)
+
+
+@pytest.fixture
+def token(app):
+    with app.app_context():
+        user_id = add_user_with_bookings(1)
+        return Invitation.query.join(Invitation.booking).filter_by(user_id=user_id).one().unique_token
+
+
+def test_read_engine_is_the_primary_file_opened_read_only(app):
+    read_engine = app.extensions['db_routing']
+    assert read_engine.url.query == {'mode': 'ro', 'uri': 'true'}
+    with read_engine.connect() as conn, pytest.raises(sa.exc.OperationalError, match='readonly'):
+        conn.exec_driver_sql('DELETE FROM feedback')
+
+
+@pytest.mark.parametrize('path', ['/venues', '/rsvp/{token}'])
+def test_read_only_views_query_the_read_engine(app, token, engines_used, path):
+    assert app.test_client().get(path.format(token=token)).status_code == 200
+    assert engines_used
+    assert set(engines_used) == {app.extensions['db_routing']}
+
+
+def test_rsvp_post_writes_through_the_primary_engine(app, token, engines_used):
+    response = app.test_client().post(f'/rsvp/{token}', data={'name': 'Aruzhan', 'rsvp_status': 'attending'})
+    assert response.status_code == 302
+    with app.app_context():
+        primary = db.engine
+    assert primary in engines_used
+    assert app.extensions['db_routing'] not in engines_used
+
+
+@session_router.read_only
+def add_feedback():
+    db.session.add(Feedback(name='x', email='x@example.kz', feedback_type='general', rating=5, message='x'))
+    db.session.flush()
+
+
+@session_router.read_only
+def bump_counters(invitation_id):
+    db.session.execute(db.update(Invitation).where(Invitation.id == invitation_id)
+                       .values(invited_count=Invitation.invited_count + 1))
+
+
+@pytest.mark.parametrize('write', [add_feedback, lambda: bump_counters(1)], ids=['flush', 'update'])
+def test_read_only_views_reject_writes(app, write):
+    with app.test_request_context('/'):
+        with pytest.raises(ReadOnlyViolation):
+            write()
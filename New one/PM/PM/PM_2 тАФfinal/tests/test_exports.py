@@ -0,0 +1,39 @@
+"""Headers of the streamed operator downloads"""
+
+
+def test_csv_export_declares_charset_once(app):
+    response = app.test_client().get('/admin/bookings/export?format=csv')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'text/csv; charset=utf-8'
+    assert response.get_data(as_text=True).startswith('\ufeff')
+
+
+def test_csv_cells_are_never_read_as_formulas():
+    import exports
+
+    rows = [['=HYPERLINK("http://x","y")', '+7 700 123 4567', '@SUM(A1)', '-2+3*cmd', 5]]
+    body = ''.join(exports.iter_csv(['a', 'b', 'c', 'd', 'e'], rows))
+    assert body.splitlines()[1] == '"\'=HYPERLINK(""http://x"",""y"")",+7 700 123 4567,\'@SUM(A1),\'-2+3*cmd,5'
+
+
+def test_reimporting_an_export_updates_bookings_instead_of_copying_them(app):
+    import io
+
+    from app import Booking, db
+    from conftest import add_user_with_bookings
+
+    with app.app_context():
+        add_user_with_bookings(2)
+        count = db.session.scalar(db.select(db.func.count(Booking.id)))
+    client = app.test_client()
+    exported = client.get('/admin/bookings/export?format=csv').get_data()
+    edited = exported + b'999999,1,,,,Ghost,ghost@example.com,1,birthday,2030-01-01,10,,,pending,,\r\n'
+
+    response = client.post('/admin/bookings/import', data={'file': (io.BytesIO(edited), 'bookings.csv')})
+    result = response.get_json()
+    assert result['inserted'] == 0
+    assert result['updated'] == count
+    assert [error['error'] for error in result['errors']] == [
+        'booking 999999 does not exist (leave id empty to add a new booking)']
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count(Booking.id))) == count
@@ -0,0 +1,65 @@
+"""Pre-invited guests: the host's views of them and who may see their personal links"""
+import pytest
+
+from app import Invitation, InvitedGuest, pre_invite_guests
+from conftest import add_user_with_bookings, log_in
+
+
+@pytest.fixture
+def host(app):
+    """(user id, invitation token) of a host with answered and pre-invited, unanswered guests"""
+    with app.app_context():
+        user_id = add_user_with_bookings(1, guests_per_invitation=2)
+        invitation = Invitation.query.join(Invitation.booking).filter_by(user_id=user_id).one()
+        pre_invite_guests(invitation.id, [('Asel', '+77015550101', ''), ('Dana', '+77015550102', '')])
+        return user_id, invitation.unique_token
+
+
+def guest_count(app, token):
+    with app.app_context():
+        return InvitedGuest.query.join(Invitation).filter(Invitation.unique_token == token).count()
+
+
+def test_profile_lists_guests_that_have_not_answered(app, host):
+    user_id, _ = host
+    client = app.test_client()
+    log_in(client, user_id)
+    response = client.get(f'/profile/{user_id}')
+    assert response.status_code == 200
+    assert 'Asel' in response.get_data(as_text=True)
+
+
+def test_owner_downloads_personal_links(app, host):
+    user_id, token = host
+    client = app.test_client()
+    log_in(client, user_id)
+    response = client.get(f'/invitation/{token}/guests/links.csv')
+    assert response.status_code == 200
+    assert f'/rsvp/{token}/g/' in response.get_data(as_text=True)
+    assert client.get(f'/invitation/{token}/export.csv').status_code == 200
+
+
+@pytest.mark.parametrize('logged_in_as', [None, 'other host'])
+def test_invitation_token_alone_does_not_reveal_or_add_guests(app, host, logged_in_as):
+    _, token = host
+    client = app.test_client()
+    if logged_in_as:
+        with app.app_context():
+            log_in(client, add_user_with_bookings(0))
+    before = guest_count(app, token)
+
+    links = client.get(f'/invitation/{token}/guests/links.csv')
+    assert links.status_code == 302
+    assert '/g/' not in links.get_data(as_text=True)
+
+    imported = client.post(f'/invitation/{token}/guests/import', data={'contacts': 'Mallory, +77015550199'})
+    assert imported.status_code == 302
+    assert guest_count(app, token) == before
+
+    for export_format in ('csv', 'xlsx'):
+        assert client.get(f'/invitation/{token}/export.{export_format}').status_code == 302
+
+    preview = client.get(f'/invitation/{token}').get_data(as_text=True)
+    assert f'/invitation/{token}/export.' not in preview
+    assert 'guests/links.csv' not in preview
+    assert 'guests/import' not in preview
@@ -0,0 +1,31 @@
+"""Read-through cache of the public RSVP page details"""
+from types import SimpleNamespace
+
+import pytest
+
+from invitation_cache import BundleCache
+
+
+def bundle(version):
+    return SimpleNamespace(version=version, booking=SimpleNamespace(id=7))
+
+
+@pytest.mark.parametrize('invalidate', [
+    lambda cache: cache.invalidate('tok'),
+    lambda cache: cache.invalidate_booking(7),
+])
+def test_bundle_loaded_before_an_edit_is_not_cached(invalidate):
+    versions = iter([1, 2])
+
+    def loader(token):
+        loaded = bundle(next(versions))
+        if loaded.version == 1:
+            # The edit commits and invalidates while this load is still running
+            invalidate(cache)
+        return loaded
+
+    cache = BundleCache(loader)
+    assert cache.get('tok').version == 1
+    assert cache.get('tok').version == 2
+    assert cache.get('tok').version == 2
+    assert cache.hits == 1
@@ -0,0 +1,19 @@
+"""Server-Sent Events streams behind the live RSVP dashboard"""
+from live_events import EventBroker
+
+
+def test_stream_ends_after_max_stream_and_resumes_from_last_event_id():
+    broker = EventBroker(heartbeat=0.01, max_stream=0.05)
+    first = broker.last_event_id('inv')
+    broker.publish('inv', 'guest', {'name': 'Asel'})
+
+    chunks = list(broker.listen('inv', first))
+    assert chunks[0] == 'retry: 3000\n\n'
+    assert chunks[1] == broker.format(1, 'guest', {'name': 'Asel'})
+    assert set(chunks[2:]) <= {': ping\n\n'}
+
+    # Published while the browser was reconnecting
+    broker.publish('inv', 'guest', {'name': 'Dana'})
+    resumed = list(broker.listen('inv', f'{broker.epoch}-1'))
+    assert resumed[1] == broker.format(2, 'guest', {'name': 'Dana'})
+    assert broker.stats()['listeners'] == 0
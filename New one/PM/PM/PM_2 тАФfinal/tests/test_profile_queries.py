@@ -0,0 +1,19 @@
+"""The profile page loads a user's bookings, invitations and guests in a fixed number of queries"""
+from conftest import add_user_with_bookings, log_in, recorded_statements
+
+
+def profile_queries(app, bookings, guests_per_invitation):
+    with app.app_context():
+        user_id = add_user_with_bookings(bookings, guests_per_invitation)
+    client = app.test_client()
+    log_in(client, user_id)
+    with recorded_statements() as statements:
+        response = client.get(f'/profile/{user_id}')
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_profile_query_count_does_not_grow_with_bookings_or_guests(app):
+    baseline = profile_queries(app, bookings=1, guests_per_invitation=1)
+    assert profile_queries(app, bookings=8, guests_per_invitation=1) == baseline
+    assert profile_queries(app, bookings=8, guests_per_invitation=25) == baseline
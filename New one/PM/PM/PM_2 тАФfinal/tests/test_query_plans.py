@@ -0,0 +1,24 @@
+"""EXPLAIN QUERY PLAN checks for the lookups that have dedicated indexes"""
+from app import User, _find_latest_relevant_booking_by_email, db
+from conftest import recorded_statements
+
+
+def query_plan(statement, params):
+    cursor = db.session.connection().connection.driver_connection.cursor()
+    return ' | '.join(row[-1] for row in cursor.execute(f'EXPLAIN QUERY PLAN {statement}', params))
+
+
+def test_latest_booking_by_email_uses_email_index(app_ctx):
+    with recorded_statements() as statements:
+        _find_latest_relevant_booking_by_email('guest@example.kz')
+    assert len(statements) == 1
+    plan = query_plan(*statements[0])
+    assert 'USING INDEX ix_booking_client_email_' in plan, plan
+    assert 'SCAN booking' not in plan, plan
+
+
+def test_profile_login_lookup_uses_unique_email_index(app_ctx):
+    with recorded_statements() as statements:
+        User.query.filter_by(email='guest@example.kz', phone='+77010000000').first()
+    plan = query_plan(*statements[-1])
+    assert 'SEARCH user USING INDEX' in plan, plan
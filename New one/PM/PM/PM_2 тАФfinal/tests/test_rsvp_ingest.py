@@ -0,0 +1,81 @@
+"""Group commit of RSVP submissions"""
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+from flask import Flask
+
+from rsvp_ingest import GroupCommitter
+
+
+@pytest.fixture
+def blocked_writer():
+    """A writer whose first batch waits for ``release``; records every batch it writes"""
+    started, release, written = threading.Event(), threading.Event(), []
+
+    def writer(items):
+        if not written:
+            started.set()
+            release.wait(5)
+        written.append(list(items))
+        return [f'id-{item}' for item in items]
+
+    writer.started, writer.release, writer.written = started, release, written
+    return writer
+
+
+@pytest.fixture
+def committer(blocked_writer):
+    """A committer on a throwaway app, so the shared app keeps its own writer"""
+    committer = GroupCommitter()
+    committer.init_app(Flask(__name__), writer=blocked_writer)
+    return committer
+
+
+def test_timed_out_submission_is_withdrawn_not_written_later(committer, blocked_writer):
+    first = committer.submit('first')
+    assert blocked_writer.started.wait(5)
+
+    # The writer is busy, so this one is still queued when its request gives up
+    late = committer.submit('late')
+    with pytest.raises(FutureTimeoutError):
+        committer.result(late, timeout=0.05)
+
+    blocked_writer.release.set()
+    assert committer.result(first, timeout=5) == 'id-first'
+    assert committer.result(committer.submit('retry'), timeout=5) == 'id-retry'
+    assert blocked_writer.written == [['first'], ['retry']]
+    assert committer.stats()['withdrawn'] == 1
+
+
+def test_timeout_waits_for_a_batch_already_being_written(committer, blocked_writer):
+    first = committer.submit('first')
+    assert blocked_writer.started.wait(5)
+
+    threading.Timer(0.1, blocked_writer.release.set).start()
+    assert committer.result(first, timeout=0.01) == 'id-first'
+    assert committer.stats()['withdrawn'] == 0
+
+
+@pytest.mark.parametrize('field, value', [
+    ('plus_one', 'abc'),
+    ('plus_one', '40'),
+    ('rsvp_status', 'maybe'),
+    ('name', 'x' * 101),
+])
+def test_invalid_rsvp_is_rejected_before_it_is_queued(app, field, value):
+    from app import Invitation, InvitedGuest
+    from conftest import add_user_with_bookings
+
+    with app.app_context():
+        user_id = add_user_with_bookings(1)
+        invitation = Invitation.query.join(Invitation.booking).filter_by(user_id=user_id).one()
+        token, invitation_id = invitation.unique_token, invitation.id
+    written = app.extensions['rsvp_committer'].stats()['items']
+    form = {'name': 'Aigerim', 'rsvp_status': 'attending', 'plus_one': '1', field: value}
+
+    response = app.test_client().post(f'/rsvp/{token}', data=form)
+    assert response.status_code == 200
+    assert app.extensions['rsvp_committer'].stats()['items'] == written
+    with app.app_context():
+        assert InvitedGuest.query.filter_by(invitation_id=invitation_id).count() == 0
@@ -0,0 +1,42 @@
+"""Server-side sessions: the cookie id changes whenever the login state does"""
+import pytest
+
+from conftest import add_user_with_bookings
+
+
+@pytest.fixture
+def user(app):
+    with app.app_context():
+        user_id = add_user_with_bookings(0)
+        from app import User
+        user = User.query.get(user_id)
+        return user_id, user.email, user.phone
+
+
+def session_id(client, app):
+    cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    return cookie.value if cookie else None
+
+
+def test_login_and_logout_move_the_session_to_a_new_id(app, user, monkeypatch):
+    monkeypatch.setitem(app.config, 'WTF_CSRF_ENABLED', False)
+    user_id, email, phone = user
+    store = app.session_interface.store
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['booking_data'] = {'venue_id': 1}
+    planted = session_id(client, app)
+    assert store.get(planted) is not None
+
+    response = client.post('/profile', data={'email': email, 'phone': phone})
+    assert response.status_code == 302
+    logged_in = session_id(client, app)
+    assert logged_in != planted
+    assert store.get(planted) is None
+    assert store.get(logged_in)['user_id'] == user_id
+    # The draft made before logging in is kept
+    assert store.get(logged_in)['booking_data'] == {'venue_id': 1}
+
+    client.get('/logout')
+    assert session_id(client, app) != logged_in
+    assert store.get(logged_in) is None